@@ -2,7 +2,7 @@
 # Distributed under the terms of the Modified BSD License.
 from IPython.core.display import display, Javascript
 
-def init():
+def init(multiplex=False):
     # JavaScript code to load the declarative widgets extension.
     # Code sent to the front end from here may be executed after
     # extension initialization (iterative cell execution) or
@@ -19,6 +19,9 @@ def init():
     # to delay javascript execution until dependencies have loaded. If
     # extension initialization has not completed a wrapper implementation
     # is setup which will invoke the real implementation when it is available.
+    #
+    # If multiplex is True, the elements share a single comm with the kernel
+    # (see widget_multiplexer.py) instead of opening one each.
     code = '''
         window.Urth = window.Urth || {};
         Urth._initialized = Urth._initialized || $.Deferred();
@@ -28,7 +31,8 @@ def init():
             });
         };
         Urth.whenReady(function() { console.log("Declarative widgets connected.") });
-        '''
+        Urth.multiplex = %s;
+        ''' % ('true' if multiplex else 'false')
 
     # Send the code to the browser.
     display(Javascript(code))
@@ -38,5 +42,10 @@ from .widget_channels import Channels
 from .widget_function import Function
 from .widget_dataframe import DataFrame
 from .widget_ipw_proxy import IpywProxy
+from .widget_multiplexer import Multiplexer
 from .util.explore import explore
+from .util.instrumentation import stats, enable_stats, disable_stats, reset_stats
 
+from .util.profiling import profile
+from .util.functions import memoize, batched
+from .util.concurrency import cancelled
@@ -22,4 +22,46 @@ class TestUrthWidget(unittest.TestCase):
         send = Mock()
         comm.attach_mock(send, 'send')
         widget = UrthWidget(comm=comm)
-        assert(send.call_count == 0)
\ No newline at end of file
+        assert(send.call_count == 0)
+
+    def test_hold_updates(self):
+        """should send the updates and status held in a single message"""
+        widget = UrthWidget(comm=Mock(spec=Comm))
+        widget._send = Mock()
+        with widget.hold_updates():
+            widget._send_update("value", 1)
+            with widget.hold_updates():
+                widget._send_update("other", 2)
+            widget.ok()
+            self.assertFalse(widget._send.called)
+
+        self.assertEqual(widget._send.call_count, 1)
+        state = widget._send.call_args[0][0]["state"]
+        self.assertEqual(set(state.keys()), {"value", "other", "__status__"})
+        self.assertEqual(state["__status__"]["status"], "ok")
+
+    def test_hold_updates_keeps_error(self):
+        """should not replace a held error status with a later ok status"""
+        widget = UrthWidget(comm=Mock(spec=Comm))
+        widget._send = Mock()
+        with widget.hold_updates():
+            widget.error("boom")
+            widget.ok()
+
+        state = widget._send.call_args[0][0]["state"]
+        self.assertEqual(state["__status__"]["status"], "error")
+        self.assertEqual(state["__status__"]["msg"], "boom")
+
+    def test_hold_updates_error(self):
+        """should send the updates held when the context raises"""
+        widget = UrthWidget(comm=Mock(spec=Comm))
+        widget._send = Mock()
+        with self.assertRaises(ValueError):
+            with widget.hold_updates():
+                widget._send_update("value", 1)
+                raise ValueError()
+
+        widget._send.assert_called_once_with(
+            {"method": "update", "state": {"value": 1}})
+        widget._send_update("value", 2)
+        self.assertEqual(widget._send.call_count, 2)
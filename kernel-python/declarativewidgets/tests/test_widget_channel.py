@@ -25,6 +25,9 @@ class TestWidgetChannel(unittest.TestCase):
         widget_channels.channel_data = defaultdict(dict)
         widget_channels.channel_watchers = defaultdict(dict)
 
+        # Some tests replace Channels.set with a mock.
+        self.channels_set = Channels.set
+
         # Setup the channel object and inputs/handlers for each test
         channel = 'c'
         self.widget = Channel(chan=channel)
@@ -42,6 +45,10 @@ class TestWidgetChannel(unittest.TestCase):
         self.lst = []
         self.handler = lambda x, y: self.lst.extend([x, y])
 
+    # Executed after each test
+    def tearDown(self):
+        Channels.set = self.channels_set
+
     #### watch()
     def test_watch(self):
         """should call watch handler when change is made"""
@@ -128,6 +135,37 @@ class TestWidgetChannel(unittest.TestCase):
         self.assertEqual(MockSet.call_count, 1)
         MockSet.assert_called_with(self.name, 'myvalue', 'c', a = 'vala', b = 'valb')
 
+    ### get()
+    def test_get_before_channels(self):
+        """should return a value set before Channels is instantiated"""
+        self.widget.set(self.name, 'myvalue')
+        self.assertEqual(self.widget.get(self.name), 'myvalue')
+        self.assertEqual(self.widget.get('other', 'dflt'), 'dflt')
+
+    def test_get_after_channels(self):
+        """should return a value set before Channels is instantiated once its state is sent"""
+        self.widget.set(self.name, 'myvalue')
+        comm = Mock(spec=Comm)
+        channels = Channels(comm=comm)
+        channels.get_state()
+        self.assertEqual(self.widget.get(self.name), 'myvalue')
+
+    ### append()
+    def test_append_before_channels(self):
+        """should send the values appended before Channels is instantiated as a list"""
+        for i in range(4):
+            self.widget.append(self.name, i, maxlen=3)
+        self.assertEqual(self.widget.get(self.name), [1, 2, 3])
+
+        comm = Mock(spec=Comm)
+        channels = Channels(comm=comm)
+        state = channels.get_state()
+        self.assertEqual(state, {"c:{}".format(self.name): [1, 2, 3]})
+
+        channels.send = Mock()
+        self.widget.append(self.name, 4, maxlen=3)
+        self.assertEqual(self.widget.get(self.name), [2, 3, 4])
+
     ### get_state()
     def test_get_state_flushes_data_cached_by_channels(self):
         """should return the state of the channels stored before created"""
@@ -6,12 +6,17 @@
 import unittest
 
 try:
-    from unittest.mock import Mock
+    from unittest.mock import Mock, patch
 except ImportError as e:
-    from mock import Mock
+    from mock import Mock, patch
 
 from ipykernel.comm import Comm
 from declarativewidgets.widget_channels import *
+from declarativewidgets.util.sharing import shared_results
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
 
 
 class TestWidgetChannels(unittest.TestCase):
@@ -43,6 +48,14 @@ class TestWidgetChannels(unittest.TestCase):
         self.widget._handle_change_msg(None, self.msg, None)
         self.assertEqual(self.lst, [1, 2])
 
+    def test_watch_invalidates_shared_results(self):
+        """should discard the results shared by DataFrame widgets after a handler runs"""
+        shared = shared_results(ip)
+        shared.get_or_compute('key', lambda: 1)
+        self.widget.watch(self.name, self.handler, self.chan)
+        self.widget._handle_change_msg(None, self.msg, None)
+        self.assertEqual(shared.get_or_compute('key', lambda: 2), 2)
+
     def test_watch_bad_channel(self):
         """should not execute a handler given an unregistered channel"""
         self.widget._handle_change_msg(None, self.msg, None)
@@ -70,6 +83,16 @@ class TestWidgetChannels(unittest.TestCase):
         self.widget._handle_change_msg(None, self.msg, None)
         self.assertEqual(self.lst, [{"a": 1}, {"b": "c"}])
 
+    def test_watch_profile(self):
+        """should profile a handler given a pending profile request"""
+        from declarativewidgets import profile
+        p = profile("{}:{}".format(self.chan, self.name))
+        self.widget.watch(self.name, self.handler, self.chan)
+        self.widget._handle_change_msg(None, self.msg, None)
+        self.assertEqual(self.lst, [1, 2])
+        self.assertEqual(p.calls, 1)
+        self.assertIsNotNone(p.stats())
+
     #### _handle_change_msg()
     def test_handle_change_msg_invoke_error(self):
         """should send an error message when handler invocation fails"""
@@ -86,3 +109,257 @@ class TestWidgetChannels(unittest.TestCase):
         self.widget._handle_change_msg(None, self.msg, None)
         self.assertEqual(self.lst, [1, 2, 'ok'])
 
+    #### set()
+    def test_set(self):
+        """should send an update for the channel variable"""
+        self.widget._send_update = Mock()
+        self.widget.set(self.name, 'myvalue', self.chan)
+        self.widget._send_update.assert_called_once_with('c:x', 'myvalue')
+
+    def test_set_throttled(self):
+        """should hold back values set faster than max_rate and send the latest one when flushed"""
+        self.widget._send_update = Mock()
+        self.widget._loop = Mock()
+        for i in range(5):
+            self.widget.set(self.name, i, self.chan, max_rate=1)
+        self.widget._send_update.assert_called_once_with('c:x', 0)
+        self.assertEqual(self.widget._loop.call_later.call_count, 1)
+
+        self.widget._flush('c:x')
+        self.assertEqual(self.widget._send_update.call_count, 2)
+        self.widget._send_update.assert_called_with('c:x', 4)
+
+    def test_set_throttled_blocked_loop(self):
+        """should send the latest value once per throttle period when the event loop cannot run"""
+        self.widget._send_update = Mock()
+        self.widget._loop = Mock()
+        now = [1000.0]
+        with patch('declarativewidgets.widget_channels.time.time', lambda: now[0]):
+            for i in range(100):
+                self.widget.set(self.name, i, self.chan, max_rate=2)
+                now[0] += 0.1
+        self.assertEqual(self.widget._send_update.call_count, 20)
+        self.assertEqual(self.widget._loop.call_later.call_count, 1)
+
+        self.widget._flush('c:x')
+        self.widget._send_update.assert_called_with('c:x', 99)
+
+    def test_set_throttled_default_rate(self):
+        """should throttle using the class level max_rate when none is given"""
+        self.widget._send_update = Mock()
+        self.widget._loop = Mock()
+        self.widget.max_rate = 1
+        self.widget.set(self.name, 1, self.chan)
+        self.widget.set(self.name, 2, self.chan)
+        self.assertEqual(self.widget._send_update.call_count, 1)
+        self.assertEqual(self.widget._loop.call_later.call_count, 1)
+
+    def test_set_unthrottled_supersedes_pending(self):
+        """should drop a held back value when a new value is sent without throttling"""
+        self.widget._send_update = Mock()
+        self.widget._loop = Mock()
+        self.widget.set(self.name, 1, self.chan, max_rate=1)
+        self.widget.set(self.name, 2, self.chan, max_rate=1)
+        self.widget.set(self.name, 3, self.chan)
+        self.widget._flush('c:x')
+        self.assertEqual(self.widget._send_update.call_count, 2)
+        self.widget._send_update.assert_called_with('c:x', 3)
+
+    def test_set_unchanged(self):
+        """should not send a value that is the same as the one last sent"""
+        self.widget._send_update = Mock()
+        self.widget.set(self.name, {'a': [1, 2]}, self.chan)
+        self.widget.set(self.name, {'a': [1, 2]}, self.chan)
+        self.assertEqual(self.widget._send_update.call_count, 1)
+
+    def test_set_unchanged_force(self):
+        """should send a value that is the same as the one last sent when forced"""
+        self.widget._send_update = Mock()
+        self.widget.set(self.name, 'myvalue', self.chan)
+        self.widget.set(self.name, 'myvalue', self.chan, force=True)
+        self.assertEqual(self.widget._send_update.call_count, 2)
+
+    def test_set_after_front_end_change(self):
+        """should send a value that differs from one changed on the front-end"""
+        self.widget._send_update = Mock()
+        self.widget.set(self.name, 1, self.chan)
+        self.widget._handle_change_msg(None, self.msg, None)
+        self.widget.set(self.name, 1, self.chan)
+        self.widget.set(self.name, 1, self.chan)
+        self.assertEqual(self.widget._send_update.call_count, 2)
+
+    #### get()
+    def test_get(self):
+        """should return the value last set in the kernel"""
+        self.widget._send_update = Mock()
+        self.widget.set(self.name, [1, 2], self.chan)
+        self.assertEqual(self.widget.get(self.name, self.chan), [1, 2])
+
+    def test_get_throttled(self):
+        """should return the latest value even if held back by throttling"""
+        self.widget._send_update = Mock()
+        self.widget._loop = Mock()
+        self.widget.set(self.name, 1, self.chan, max_rate=1)
+        self.widget.set(self.name, 2, self.chan, max_rate=1)
+        self.assertEqual(self.widget.get(self.name, self.chan), 2)
+
+    def test_get_front_end_change(self):
+        """should return the value last changed on the front-end"""
+        self.widget._handle_change_msg(None, self.msg, None)
+        self.assertEqual(self.widget.get(self.name, self.chan), 2)
+
+    def test_get_unknown(self):
+        """should return the default for a variable with no known value"""
+        self.assertEqual(self.widget.get(self.name, self.chan, 'dflt'), 'dflt')
+
+    #### threaded watch()
+    def _run_threaded(self, loop):
+        """Waits for the handler futures handed to the loop and completes them"""
+        while loop.add_future.call_count:
+            future, callback = loop.add_future.call_args[0]
+            loop.add_future.reset_mock()
+            future.exception(timeout=5)
+            callback(future)
+
+    def test_watch_threaded(self):
+        """should run a threaded handler in a thread pool"""
+        import threading
+        self.widget._loop = Mock()
+        self.widget.ok = lambda: self.lst.append('ok')
+        handler = lambda x, y: self.lst.extend([x, y, threading.current_thread().name])
+        self.widget.watch(self.name, handler, self.chan, threaded=True)
+        self.widget._handle_change_msg(None, self.msg, None)
+        self._run_threaded(self.widget._loop)
+        self.assertEqual(self.lst[:2], [1, 2])
+        self.assertNotEqual(self.lst[2], threading.current_thread().name)
+        self.assertEqual(self.lst[3], 'ok')
+
+    def test_watch_threaded_set(self):
+        """should hand values set by a threaded handler over to the kernel's thread"""
+        self.widget._loop = Mock()
+        self.widget._send_update = Mock()
+        handler = lambda x, y: self.widget.set('y', y, self.chan, max_rate=1)
+        self.widget.watch(self.name, handler, self.chan, threaded=True)
+        self.widget._handle_change_msg(None, self.msg, None)
+        self._run_threaded(self.widget._loop)
+        self.assertFalse(self.widget._send_update.called)
+        self.assertFalse(self.widget._loop.call_later.called)
+
+        callback = self.widget._loop.add_callback.call_args[0]
+        callback[0](*callback[1:])
+        self.widget._send_update.assert_called_once_with('c:y', 2)
+
+    def test_watch_threaded_error(self):
+        """should send an error message when a threaded handler fails"""
+        self.widget._loop = Mock()
+        self.widget.error = lambda msg: self.lst.append('err')
+        self.widget.watch(self.name, lambda x, y: 1 / 0, self.chan, threaded=True)
+        self.widget._handle_change_msg(None, self.msg, None)
+        self._run_threaded(self.widget._loop)
+        self.assertEqual(self.lst, ['err'])
+
+    def test_watch_threaded_drop_stale(self):
+        """should only run the latest change that arrived while a threaded handler was running"""
+        self.widget._loop = Mock()
+        self.widget.watch(self.name, self.handler, self.chan, threaded=True)
+        for i in range(4):
+            self.msg['data']['old_val'] = i
+            self.msg['data']['new_val'] = i + 1
+            self.widget._handle_change_msg(None, self.msg, None)
+        self._run_threaded(self.widget._loop)
+        self.assertEqual(self.lst, [0, 1, 1, 4])
+
+    def test_watch_threaded_keep_stale(self):
+        """should run every change in order when stale changes are kept"""
+        self.widget._loop = Mock()
+        self.widget.watch(self.name, self.handler, self.chan, threaded=True, drop_stale=False)
+        for i in range(3):
+            self.msg['data']['old_val'] = i
+            self.msg['data']['new_val'] = i + 1
+            self.widget._handle_change_msg(None, self.msg, None)
+        self._run_threaded(self.widget._loop)
+        self.assertEqual(self.lst, [0, 1, 1, 2, 2, 3])
+
+    #### debounced and throttled watch()
+    def _send_changes(self, n):
+        for i in range(n):
+            self.msg['data']['old_val'] = i
+            self.msg['data']['new_val'] = i + 1
+            self.widget._handle_change_msg(None, self.msg, None)
+
+    def test_watch_debounce(self):
+        """should call a debounced handler once with the first old and last new values"""
+        self.widget._loop = Mock()
+        self.widget.watch(self.name, self.handler, self.chan, debounce_ms=100)
+        self._send_changes(5)
+        self.assertEqual(self.lst, [])
+        self.assertEqual(self.widget._loop.call_later.call_count, 5)
+        self.assertEqual(self.widget._loop.remove_timeout.call_count, 4)
+
+        delay, release, watcher, key, chan = self.widget._loop.call_later.call_args[0]
+        self.assertEqual(delay, 0.1)
+        release(watcher, key, chan)
+        self.assertEqual(self.lst, [0, 5])
+
+    def test_watch_throttle(self):
+        """should call a throttled handler immediately and coalesce the following changes"""
+        self.widget._loop = Mock()
+        self.widget.watch(self.name, self.handler, self.chan, throttle_ms=1000)
+        self._send_changes(5)
+        self.assertEqual(self.lst, [0, 1])
+        self.assertEqual(self.widget._loop.call_later.call_count, 1)
+
+        delay, release, watcher, key, chan = self.widget._loop.call_later.call_args[0]
+        self.assertTrue(0 < delay <= 1)
+        release(watcher, key, chan)
+        self.assertEqual(self.lst, [0, 1, 1, 5])
+
+    def test_watch_debounce_max_wait(self):
+        """should not hold back a debounced burst longer than the throttle period"""
+        self.widget._loop = Mock()
+        self.widget.watch(self.name, self.handler, self.chan, debounce_ms=500, throttle_ms=200)
+        self._send_changes(2)
+        delay = self.widget._loop.call_later.call_args[0][0]
+        self.assertTrue(delay <= 0.2)
+
+    #### append()
+    def test_append(self):
+        """should send only the appended value"""
+        self.widget.send = Mock()
+        self.widget.append(self.name, 1, self.chan)
+        self.widget.append(self.name, 2, self.chan)
+        self.assertEqual(self.widget.send.call_count, 2)
+        self.widget.send.assert_called_with({
+            'event': 'append', 'channel': 'c', 'name': 'x', 'items': [2], 'maxlen': 10000
+        })
+        self.assertEqual(self.widget.get(self.name, self.chan), [1, 2])
+
+    def test_append_maxlen(self):
+        """should keep at most maxlen values"""
+        self.widget.send = Mock()
+        for i in range(5):
+            self.widget.append(self.name, i, self.chan, maxlen=3)
+        self.assertEqual(self.widget.get(self.name, self.chan), [2, 3, 4])
+
+    def test_append_throttled(self):
+        """should send values appended faster than max_rate together"""
+        self.widget.send = Mock()
+        self.widget._loop = Mock()
+        for i in range(4):
+            self.widget.append(self.name, i, self.chan, max_rate=1)
+        self.assertEqual(self.widget.send.call_count, 1)
+        self.assertEqual(self.widget._loop.call_later.call_count, 1)
+
+        self.widget._flush('c:x')
+        self.assertEqual(self.widget.send.call_count, 2)
+        self.assertEqual(self.widget.send.call_args[0][0]['items'], [1, 2, 3])
+
+    def test_set_after_append(self):
+        """should replace the appended values when set, and append to the value set"""
+        self.widget.send = Mock()
+        self.widget._send_update = Mock()
+        self.widget.append(self.name, 1, self.chan)
+        self.widget.set(self.name, [5], self.chan)
+        self.widget.append(self.name, 6, self.chan)
+        self.assertEqual(self.widget.get(self.name, self.chan), [5, 6])
+        self.assertEqual(self.widget._send_update.call_count, 1)
@@ -0,0 +1,55 @@
+# (c) Copyright Jupyter Development Team
+
+""" Tests for the widget_channels.py module using coroutines, which require Python 3.5 """
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+import asyncio
+from tornado.ioloop import IOLoop
+from ipykernel.comm import Comm
+from declarativewidgets.widget_channels import *
+
+
+class TestWidgetChannelsPy35(unittest.TestCase):
+
+    def setUp(self):
+        comm = Mock(spec=Comm)
+        self.widget = Channels(comm=comm)
+        self.widget.ok = lambda: self.lst.append('ok')
+
+        self.msg = {
+            'event': 'change',
+            'data': {
+                'channel': 'c',
+                'name': 'x',
+                'old_val': 1,
+                'new_val': 2
+            }
+        }
+
+        self.lst = []
+
+    def test_watch_coroutine(self):
+        """should run a coroutine handler on the event loop"""
+        done = asyncio.Event()
+
+        async def handler(old, new):
+            await asyncio.sleep(0)
+            self.lst.extend([old, new])
+            done.set()
+
+        async def run():
+            self.widget._loop = IOLoop.current()
+            self.widget.watch('x', handler, 'c')
+            self.widget._handle_change_msg(None, self.msg, None)
+            self.assertEqual(self.lst, [])
+            await done.wait()
+            await asyncio.sleep(0)
+
+        IOLoop.current().run_sync(run)
+        self.assertEqual(self.lst, [1, 2, 'ok'])
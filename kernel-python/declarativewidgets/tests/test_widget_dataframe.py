@@ -0,0 +1,168 @@
+# (c) Copyright Jupyter Development Team
+
+import unittest
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError as e:
+    from mock import Mock, patch
+
+import pandas as pd
+from ipykernel.comm import Comm
+from declarativewidgets.widget_dataframe import DataFrame
+from declarativewidgets.util.sharing import shared_results
+from declarativewidgets.util.idle import IdleScheduler
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
+
+
+class TestWidgetDataFrame(unittest.TestCase):
+    def setUp(self):
+        comm = Mock(spec=Comm)
+        self.widget = DataFrame(comm=comm)
+        self.widget._send_update = Mock()
+        self.widget.ok = Mock()
+        ip.user_ns['mock_df'] = pd.DataFrame({'a': [1, 2, 3]})
+        self.widget.variable_name = 'mock_df'
+
+    def tearDown(self):
+        self.widget.auto = False
+
+    def test_sync_state(self):
+        """should send the serialized DataFrame"""
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        value = self.widget._send_update.call_args[0][1]
+        self.assertEqual(value['data'], [[1], [2], [3]])
+
+    def test_sync_state_single_message(self):
+        """should send the value and the status in a single update"""
+        widget = DataFrame(comm=Mock(spec=Comm), variable_name='mock_df')
+        widget._send = Mock()
+        widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.assertEqual(widget._send.call_count, 1)
+        state = widget._send.call_args[0][0]['state']
+        self.assertEqual(state['value']['data'], [[1], [2], [3]])
+        self.assertEqual(state['__status__']['status'], 'ok')
+
+    def test_sync_state_shared(self):
+        """should compute the value once for widgets with the same variable, query and limit"""
+        other = DataFrame(comm=Mock(spec=Comm), variable_name='mock_df')
+        other._send_update = Mock()
+        other.ok = Mock()
+        other.serializer = Mock(wraps=other.serializer)
+        self.widget.serializer = Mock(wraps=self.widget.serializer)
+        shared_results(ip).invalidate()
+
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        other._handle_state_msg(None, {'event': 'sync'}, None)
+        self.assertEqual(self.widget.serializer.serialize.call_count, 1)
+        self.assertFalse(other.serializer.serialize.called)
+        self.assertEqual(other._send_update.call_args, self.widget._send_update.call_args)
+
+        other.limit = 1
+        other._handle_state_msg(None, {'event': 'sync'}, None)
+        self.assertEqual(other.serializer.serialize.call_count, 1)
+
+    def test_sync_state_offset(self):
+        """should send the window of rows starting at the offset"""
+        self.widget.offset = 1
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        value = self.widget._send_update.call_args[0][1]
+        self.assertEqual(value['data'], [[2], [3]])
+
+    def test_prefetch(self):
+        """should compute the adjacent windows and the reverse sort when idle"""
+        scheduler = IdleScheduler(Mock())
+        self.widget.limit = 1
+        self.widget.offset = 1
+        self.widget.query = '[{"type": "sort", "expr": {"by": "a", "ascending": true}}]'
+        self.widget.prefetch = True
+        shared_results(ip).invalidate()
+
+        with patch('declarativewidgets.widget_dataframe.idle_scheduler', return_value=scheduler):
+            self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.assertEqual(scheduler.pending(), 3)
+        while scheduler.pending():
+            scheduler._run()
+
+        self.widget.prefetch = False
+        self.widget.serializer = Mock(wraps=self.widget.serializer)
+        windows = []
+        for offset, query in [(2, self.widget.query), (0, self.widget.query),
+                              (1, '[{"type": "sort", "expr": {"ascending": false, "by": "a"}}]')]:
+            self.widget.offset = offset
+            self.widget.query = query
+            self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+            windows.append(self.widget._send_update.call_args[0][1]['data'])
+        self.assertEqual(windows, [[[3]], [[1]], [[2]]])
+        self.assertFalse(self.widget.serializer.serialize.called)
+
+    def test_sync_state_adaptive_limit(self):
+        """should send the number of rows fitting the byte budget"""
+        ip.user_ns['mock_df'] = pd.DataFrame({'a': list(range(1000))})
+        self.widget.limit = 10
+        self.widget.byte_budget = 100
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.widget._send_update.assert_any_call("effective_limit", 10)
+
+        expected = int(100 / self.widget._adaptive.bytes_per_row)
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        limit = self.widget._send_update.call_args_list[-1][0][1]
+        value = self.widget._send_update.call_args_list[-2][0][1]
+        self.assertEqual(limit, expected)
+        self.assertEqual(len(value['data']), limit)
+
+    def test_auto_push(self):
+        """should push the value after an execution that changes the variable"""
+        self.widget.auto = True
+        self.widget._send_update.assert_called_once_with("auto_push", True)
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.widget._send_update.reset_mock()
+
+        ip.events.trigger('post_execute')
+        ip.events.trigger('post_run_cell')
+        self.assertFalse(self.widget._send_update.called)
+
+        ip.user_ns['mock_df'] = pd.DataFrame({'a': [4]})
+        ip.events.trigger('post_execute')
+        ip.events.trigger('post_run_cell')
+        value = self.widget._send_update.call_args[0][1]
+        self.assertEqual(value['data'], [[4]])
+
+    def test_auto_push_disabled(self):
+        """should not push the value unless auto is set"""
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.widget._send_update.reset_mock()
+
+        ip.user_ns['mock_df'] = pd.DataFrame({'a': [4]})
+        ip.events.trigger('post_execute')
+        ip.events.trigger('post_run_cell')
+        self.assertFalse(self.widget._send_update.called)
+
+    def test_auto_push_mutated(self):
+        """should push the value after an execution that mutates the DataFrame"""
+        self.widget.auto = True
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.widget._send_update.reset_mock()
+
+        ip.user_ns['mock_df']['a'] = [7, 8, 9]
+        ip.events.trigger('post_execute')
+        ip.events.trigger('post_run_cell')
+        value = self.widget._send_update.call_args[0][1]
+        self.assertEqual(value['data'], [[7], [8], [9]])
+
+    def test_auto_push_unfingerprinted(self):
+        """should push the value after every execution for data whose changes cannot be detected"""
+        ip.user_ns['mock_dict'] = {'a': [1, 2]}
+        self.widget.variable_name = 'mock_dict'
+        self.widget.auto = True
+        self.widget._handle_state_msg(None, {'event': 'sync'}, None)
+        self.widget._send_update.reset_mock()
+
+        ip.user_ns['mock_dict']['a'] = [9, 9]
+        ip.events.trigger('post_execute')
+        ip.events.trigger('post_run_cell')
+        value = self.widget._send_update.call_args[0][1]
+        self.assertEqual(value, {'a': [9, 9]})
@@ -15,6 +15,24 @@ from IPython.testing.globalipapp import get_ipython
 ip = get_ipython()
 
 
+# Functions run in a worker process are defined at module level so they can be
+# pickled without cloudpickle.
+def process_pid(x=1):
+    import os
+    return os.getpid()
+
+
+def process_sleep(x=1):
+    import time
+    time.sleep(30)
+
+
+def process_sleep_briefly(x=1):
+    import time
+    time.sleep(0.5)
+    return 'done'
+
+
 class TestWidgetFunction(unittest.TestCase):
     def setUp(self):
         comm = Mock(spec=Comm)
@@ -30,6 +48,14 @@ class TestWidgetFunction(unittest.TestCase):
 
         assert self.fun._the_function()(3) == 5
 
+    def test_bind_missing_function(self):
+        """should send an error status when bound to a missing name"""
+        self.fun._send = Mock()
+        self.fun.function_name = 'does_not_exist'
+        self.assertEqual(self.fun._send.call_count, 1)
+        state = self.fun._send.call_args[0][0]["state"]
+        self.assertEqual(state["__status__"]["status"], "error")
+
     def test_the_function_object_scope(self):
         class mock_class():
             def mock_class_function(self, x):
@@ -42,3 +68,327 @@ class TestWidgetFunction(unittest.TestCase):
         self.fun.function_name = 'mock_object.mock_class_function'
 
         assert self.fun._the_function()(3) == 6
+
+    def test_invoke_stats(self):
+        """should record the phases of an invocation when stats are enabled"""
+        from declarativewidgets.util import instrumentation
+        ip.user_ns['mock_function'] = lambda x: x
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        instrumentation.enable_stats(include_status=True)
+        try:
+            self.fun._invoke({'x': 1})
+            stats = instrumentation.stats()['widgets'][self.fun.model_id]
+        finally:
+            instrumentation.disable_stats()
+            instrumentation.reset_stats()
+
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(sorted(stats['phases'].keys()), ['invoke', 'resolve', 'send', 'serialize'])
+        self.assertEqual(self.fun.ok.call_args[1]['stats']['count'], 1)
+
+    def test_invoke_timing(self):
+        """should send the timing breakdown with the status when requested"""
+        ip.user_ns['mock_function'] = lambda x: [x, x]
+        self.fun.function_name = 'mock_function'
+        self.fun.timing = True
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._invoke({'x': 1})
+
+        timing = self.fun.ok.call_args[1]['timing']
+        self.assertEqual(sorted(timing.keys()),
+                         ['bytes', 'invoke', 'resolve', 'rows_in', 'rows_out', 'send', 'serialize'])
+        self.assertEqual(timing['rows_in'], 2)
+        self.assertEqual(timing['bytes'], len('[1, 1]'))
+
+    def test_invoke_cache(self):
+        """should memoize results by converted arguments when enabled"""
+        calls = []
+
+        def mock_function(x=1):
+            calls.append(x)
+            return x
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun.cache_size = 2
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._invoke({'x': '1'})
+        self.fun._invoke({'x': 1})
+        self.assertEqual(calls, [1])
+        self.assertEqual(self.fun._send_update.call_count, 2)
+
+        self.fun._handle_custom_event_msg(None, {'event': 'invalidate'}, None)
+        self.fun._invoke({'x': 1})
+        self.assertEqual(calls, [1, 1])
+
+    def test_invoke_adaptive_limit(self):
+        """should adapt the rows of DataFrame results to the byte budget"""
+        import pandas as pd
+        ip.user_ns['mock_function'] = lambda: pd.DataFrame({'a': list(range(1000))})
+        self.fun.function_name = 'mock_function'
+        self.fun.limit = 10
+        self.fun.byte_budget = 100
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._invoke({})
+        self.fun._send_update.assert_any_call("effective_limit", 10)
+        expected = int(100 / self.fun._adaptive.bytes_per_row)
+        self.fun._invoke({})
+        limit = self.fun._send_update.call_args_list[-1][0][1]
+        result = self.fun._send_update.call_args_list[-2][0][1]
+        self.assertEqual(limit, expected)
+        self.assertEqual(len(result['data']), limit)
+
+    def test_invoke_cache_rebound(self):
+        """should not return results of a function the name was bound to before"""
+        ip.user_ns['mock_function'] = lambda x=1: x
+        self.fun.function_name = 'mock_function'
+        self.fun.cache_size = 2
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._invoke({'x': 1})
+        ip.user_ns['mock_function'] = lambda x=1: x + 1
+        self.fun._invoke({'x': 1})
+        self.assertEqual(self.fun._send_update.call_args[0][1], 2)
+
+    def _run_async(self, args):
+        """invokes in the background and completes on a mock event loop"""
+        self.fun._loop = Mock()
+        self.fun._invoke(args)
+        future = self.fun._pending
+        future.exception(timeout=10)
+        callback = self.fun._loop.add_future.call_args[0][1]
+        callback(future)
+
+    def test_invoke_thread(self):
+        """should run the function in the thread pool when requested"""
+        import threading
+        ip.user_ns['mock_function'] = lambda x=1: threading.current_thread().name
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'thread'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self._run_async({'x': 1})
+        self.assertNotEqual(self.fun._send_update.call_args[0][1],
+                            threading.current_thread().name)
+        self.assertTrue(self.fun.ok.called)
+
+    def test_invoke_thread_profile(self):
+        """should profile the function run in the thread pool given a pending profile request"""
+        from declarativewidgets import profile
+        def profiled_function(x=1):
+            return x
+        ip.user_ns['mock_function'] = profiled_function
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'thread'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        p = profile('mock_function')
+        self._run_async({'x': 1})
+        self.assertEqual(p.calls, 1)
+        names = [func[2] for func in p.stats().stats]
+        self.assertIn('profiled_function', names)
+
+    def test_invoke_process_profile(self):
+        """should not take profile requests for functions run in the worker process"""
+        from declarativewidgets import profile
+        ip.user_ns['mock_function'] = process_pid
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'process'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        p = profile('mock_function')
+        self._run_async({'x': 1})
+        self.assertEqual(p.calls, 0)
+        p.cancel()
+
+    def test_invoke_process(self):
+        """should run the function in the process pool when requested"""
+        import os
+        ip.user_ns['mock_function'] = process_pid
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'process'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self._run_async({'x': 1})
+        self.assertNotEqual(self.fun._send_update.call_args[0][1], os.getpid())
+        self.assertTrue(self.fun.ok.called)
+
+    def test_invoke_process_not_picklable(self):
+        """should send an error when the arguments cannot be pickled"""
+        import threading
+        lock = threading.Lock()
+        ip.user_ns['mock_function'] = lambda x=1: lock
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'process'
+        self.fun.error = Mock()
+
+        self.fun._invoke({'x': 1})
+        self.assertIn("must be picklable", self.fun.error.call_args[0][0])
+
+    def test_invoke_batch(self):
+        """should send the results of a batch of calls in one update"""
+        ip.user_ns['mock_function'] = lambda x=1: x * 2
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._handle_custom_event_msg(
+            None, {'event': 'invoke_batch', 'args_list': [{'x': '1'}, {'x': 2}, {}]}, None)
+        self.fun._send_update.assert_called_once_with("batch_result", [2, 4, 2])
+        self.assertTrue(self.fun.ok.called)
+
+    def test_invoke_batch_thread(self):
+        """should run a batch in the thread pool when requested"""
+        ip.user_ns['mock_function'] = lambda x=1: x * 2
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'thread'
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._loop = Mock()
+        self.fun._invoke_batch([{'x': 1}, {'x': 2}])
+        future = self.fun._pending
+        future.exception(timeout=10)
+        self.fun._loop.add_future.call_args[0][1](future)
+        self.fun._send_update.assert_called_once_with("batch_result", [2, 4])
+
+    def test_invoke_generator(self):
+        """should stream the values of a generator as acked by the front-end"""
+        def mock_function(n=3):
+            for i in range(n):
+                yield i
+
+        callbacks = []
+        self.fun._loop = Mock()
+        self.fun._loop.add_callback = lambda *args: callbacks.append(args)
+
+        def run_loop():
+            while callbacks:
+                args = callbacks.pop(0)
+                args[0](*args[1:])
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun.stream_window = 2
+        self.fun._send_update = Mock()
+        self.fun.send = Mock()
+        self.fun.ok = Mock()
+
+        self.fun._invoke({'n': 3})
+        run_loop()
+        self.fun._send_update.assert_called_once_with("result", [])
+        self.assertEqual([c[0][0]['seq'] for c in self.fun.send.call_args_list], [0, 1])
+
+        self.fun._handle_custom_event_msg(None, {'event': 'ack', 'seq': 0}, None)
+        run_loop()
+        self.assertEqual([c[0][0]['result'] for c in self.fun.send.call_args_list], [0, 1, 2])
+        self.assertFalse(self.fun.ok.called)
+
+        self.fun._handle_custom_event_msg(None, {'event': 'ack', 'seq': 2}, None)
+        run_loop()
+        self.assertEqual(self.fun.ok.call_args[1]['chunks'], 3)
+        self.assertIsNone(self.fun._stream)
+
+    def test_invoke_generator_cancel(self):
+        """should close a streaming generator when invoked again"""
+        closed = []
+
+        def mock_function(n=3):
+            try:
+                for i in range(n):
+                    yield i
+            finally:
+                closed.append(n)
+
+        self.fun._loop = Mock()
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update = Mock()
+        self.fun.send = Mock()
+
+        self.fun._invoke({'n': 3})
+        stream = self.fun._stream
+        next(stream.generator)
+        self.fun._invoke({'n': 4})
+        self.assertEqual(closed, [3])
+        self.assertIsNot(self.fun._stream, stream)
+
+    def test_invoke_timeout(self):
+        """should cancel a thread invocation after the timeout"""
+        import threading
+        from declarativewidgets import cancelled
+        started = threading.Event()
+
+        def mock_function(x=1):
+            started.set()
+            while not cancelled():
+                started.wait(0.01)
+            return 'stopped'
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'thread'
+        self.fun.timeout = 50
+        self.fun._send_update = Mock()
+        self.fun.send_status = Mock()
+        self.fun._loop = Mock()
+
+        self.fun._invoke({'x': 1})
+        future = self.fun._pending
+        started.wait(5)
+        delay, callback = self.fun._loop.call_later.call_args[0]
+        self.assertEqual(delay, 0.05)
+        callback()
+
+        self.assertEqual(future.result(timeout=5), 'stopped')
+        self.assertEqual(self.fun.send_status.call_args[0][0], "timeout")
+        self.assertIsNone(self.fun._pending)
+        self.fun._loop.add_future.call_args[0][1](future)
+        self.assertFalse(self.fun._send_update.called)
+
+    def test_cancel_process(self):
+        """should terminate a process invocation when cancelled, but not those of other functions"""
+        import time
+        ip.user_ns['mock_function'] = process_sleep
+        self.fun.function_name = 'mock_function'
+        self.fun.execution = 'process'
+        self.fun.send_status = Mock()
+        self.fun._loop = Mock()
+
+        self.fun._invoke({'x': 1})
+        future = self.fun._pending
+        while not future.running():
+            time.sleep(0.01)
+
+        other = Function(comm=Mock(spec=Comm))
+        other.function_name = 'mock_other_function'
+        other.execution = 'process'
+        other._loop = Mock()
+        ip.user_ns['mock_other_function'] = process_sleep_briefly
+        other._invoke({'x': 1})
+        other_future = other._pending
+
+        self.fun._handle_custom_event_msg(None, {'event': 'cancel'}, None)
+        self.assertIsNotNone(future.exception(timeout=10))
+        self.assertEqual(self.fun.send_status.call_args[0][0], "cancelled")
+        self.assertEqual(other_future.result(timeout=10), 'done')
+
+    def test_cancel_nothing_pending(self):
+        """should not send a status when no invocation is in progress"""
+        self.fun.send_status = Mock()
+        self.fun._handle_custom_event_msg(None, {'event': 'cancel'}, None)
+        self.assertFalse(self.fun.send_status.called)
@@ -0,0 +1,96 @@
+# (c) Copyright Jupyter Development Team
+
+""" Tests for the widget_function.py module using coroutines, which require Python 3.5 """
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+import asyncio
+from tornado.ioloop import IOLoop
+from ipykernel.comm import Comm
+from declarativewidgets.widget_function import Function
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
+
+
+class TestWidgetFunctionPy35(unittest.TestCase):
+
+    def setUp(self):
+        comm = Mock(spec=Comm)
+        self.fun = Function(comm=comm)
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+        self.fun.error = Mock()
+
+    def test_invoke_coroutine(self):
+        """should run a coroutine function on the event loop and send its result"""
+        async def mock_function(x: int):
+            await asyncio.sleep(0)
+            return x + 1
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update.reset_mock()
+
+        async def run():
+            self.fun._loop = IOLoop.current()
+            self.fun._invoke({'x': '1'})
+            self.assertFalse(self.fun._send_update.called)
+            while self.fun._pending is not None:
+                await asyncio.sleep(0.01)
+
+        IOLoop.current().run_sync(run)
+        self.fun._send_update.assert_called_once_with("result", 2)
+        self.assertTrue(self.fun.ok.called)
+
+    def test_invoke_coroutine_cancel(self):
+        """should cancel a coroutine still in progress when invoked again"""
+        started = []
+
+        async def mock_function(x: int):
+            started.append(x)
+            await asyncio.sleep(0.05 if x == 1 else 0)
+            return x
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update.reset_mock()
+
+        async def run():
+            self.fun._loop = IOLoop.current()
+            self.fun._invoke({'x': 1})
+            first = self.fun._pending
+            await asyncio.sleep(0)
+            self.fun._invoke({'x': 2})
+            while self.fun._pending is not None:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            self.assertTrue(first.cancelled())
+
+        IOLoop.current().run_sync(run)
+        self.assertEqual(started, [1, 2])
+        self.fun._send_update.assert_called_once_with("result", 2)
+
+    def test_invoke_coroutine_error(self):
+        """should send an error status when the coroutine raises"""
+        async def mock_function():
+            raise ValueError("boom")
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update.reset_mock()
+
+        async def run():
+            self.fun._loop = IOLoop.current()
+            self.fun._invoke({})
+            while self.fun._pending is not None:
+                await asyncio.sleep(0.01)
+
+        IOLoop.current().run_sync(run)
+        self.assertIn("boom", self.fun.error.call_args[0][0])
@@ -0,0 +1,57 @@
+# (c) Copyright Jupyter Development Team
+
+""" Tests for the widget_function.py module using async generators, which require Python 3.6 """
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+import asyncio
+from tornado.ioloop import IOLoop
+from ipykernel.comm import Comm
+from declarativewidgets.widget_function import Function
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
+
+
+class TestWidgetFunctionPy36(unittest.TestCase):
+
+    def setUp(self):
+        comm = Mock(spec=Comm)
+        self.fun = Function(comm=comm)
+        self.fun._send_update = Mock()
+        self.fun.ok = Mock()
+        self.fun.error = Mock()
+
+    def test_invoke_async_generator(self):
+        """should stream the values of an async generator"""
+        async def mock_function(n: int):
+            for i in range(n):
+                await asyncio.sleep(0)
+                yield i
+
+        ip.user_ns['mock_function'] = mock_function
+        self.fun.function_name = 'mock_function'
+        self.fun._send_update.reset_mock()
+
+        chunks = []
+
+        def send(content):
+            chunks.append(content['result'])
+            self.fun._ack(content['seq'])
+        self.fun.send = send
+
+        async def run():
+            self.fun._loop = IOLoop.current()
+            self.fun._invoke({'n': '5'})
+            while self.fun._stream is not None:
+                await asyncio.sleep(0.01)
+
+        IOLoop.current().run_sync(run)
+        self.assertEqual(chunks, [0, 1, 2, 3, 4])
+        self.assertEqual(self.fun.ok.call_args[1]['chunks'], 5)
@@ -0,0 +1,119 @@
+# (c) Copyright Jupyter Development Team
+
+""" Tests for the widget_multiplexer.py module """
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+import pandas as pd
+from ipykernel.comm import Comm
+from declarativewidgets.widget_dataframe import DataFrame
+from declarativewidgets.widget_multiplexer import Multiplexer
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
+
+
+class TestWidgetMultiplexer(unittest.TestCase):
+
+    def setUp(self):
+        self.mux = Multiplexer(comm=Mock(spec=Comm))
+        self.mux.send = Mock()
+        ip.user_ns['mock_df'] = pd.DataFrame({'a': [1, 2, 3]})
+
+    def frames(self, *frames):
+        self.mux._handle_frames_msg(None, {'event': 'frames', 'frames': list(frames)}, [])
+
+    def sent_frames(self):
+        return [frame for call in self.mux.send.call_args_list
+                for frame in call[0][0]['frames']]
+
+    def test_open(self):
+        """should create a widget of the class opened"""
+        self.frames({'id': 1, 'open': 'declarativewidgets.DataFrame'})
+        widget = self.mux._widgets[1]._widget()
+        self.assertIsInstance(widget, DataFrame)
+        self.assertFalse(self.mux.send.called)
+
+    def test_open_invalid(self):
+        """should close a widget whose class is not an urth widget"""
+        self.frames({'id': 1, 'open': 'collections.OrderedDict'})
+        self.assertEqual(self.sent_frames(), [{'id': 1, 'close': True}])
+        self.assertNotIn(1, self.mux._widgets)
+
+    def test_route(self):
+        """should route frames to their widget and batch the frames sent"""
+        self.frames(
+            {'id': 1, 'open': 'declarativewidgets.DataFrame'},
+            {'id': 2, 'open': 'declarativewidgets.DataFrame'})
+        for rid in (1, 2):
+            self.mux._widgets[rid]._widget().variable_name = 'mock_df'
+
+        sync = {'method': 'custom', 'content': {'event': 'sync'}}
+        self.frames({'id': 1, 'data': sync}, {'id': 2, 'data': sync})
+
+        self.assertEqual(self.mux.send.call_count, 1)
+        frames = self.sent_frames()
+        self.assertEqual([frame['id'] for frame in frames], [1, 2])
+        state = frames[0]['data']['state']
+        self.assertEqual(state['value']['data'], [[1], [2], [3]])
+        self.assertEqual(state['__status__']['status'], 'ok')
+
+    def test_send_outside_handler(self):
+        """should send a frame right away when not handling a message"""
+        self.frames({'id': 1, 'open': 'declarativewidgets.DataFrame'})
+        widget = self.mux._widgets[1]._widget()
+        widget.send({'event': 'x'}, [b'abc'])
+        self.mux.send.assert_called_once_with({'event': 'frames', 'frames': [
+            {'id': 1, 'data': {'method': 'custom', 'content': {'event': 'x'}},
+             'buffers': [0]}]}, [b'abc'])
+
+    def test_close(self):
+        """should close the widget when the front-end closes it"""
+        self.frames({'id': 1, 'open': 'declarativewidgets.DataFrame'})
+        widget = self.mux._widgets[1]._widget()
+        self.frames({'id': 1, 'close': True})
+        self.assertNotIn(1, self.mux._widgets)
+        self.assertIsNone(widget.comm)
+        self.assertFalse(self.mux.send.called)
+
+    def test_defer_hidden(self):
+        """should handle the frames of hidden elements after the others"""
+        self.mux._loop = Mock()
+        self.frames(
+            {'id': 1, 'open': 'declarativewidgets.DataFrame'},
+            {'id': 2, 'open': 'declarativewidgets.DataFrame'})
+        for rid in (1, 2):
+            self.mux._widgets[rid]._widget().variable_name = 'mock_df'
+
+        sync = {'method': 'custom', 'content': {'event': 'sync'}}
+        self.frames({'id': 1, 'data': sync, 'visible': False},
+                    {'id': 2, 'data': sync})
+        self.assertEqual([frame['id'] for frame in self.sent_frames()], [2])
+
+        self.mux._loop.add_callback.assert_called_once_with(self.mux._route_deferred)
+        self.mux._route_deferred()
+        self.assertEqual([frame['id'] for frame in self.sent_frames()], [2, 1])
+        self.assertEqual(self.mux._loop.add_callback.call_count, 1)
+
+    def test_defer_in_order(self):
+        """should handle deferred frames of a widget before its newer frames"""
+        self.mux._loop = Mock()
+        self.frames({'id': 1, 'open': 'declarativewidgets.DataFrame'})
+        widget = self.mux._widgets[1]._widget()
+        widget._handle_custom_msg = Mock()
+
+        first = {'method': 'custom', 'content': {'event': 'first'}}
+        second = {'method': 'custom', 'content': {'event': 'second'}}
+        self.frames({'id': 1, 'data': first, 'visible': False})
+        self.frames({'id': 1, 'data': second})
+
+        events = [call[0][0]['event'] for call in widget._handle_custom_msg.call_args_list]
+        self.assertEqual(events, ['first', 'second'])
+        self.mux._route_deferred()
+        self.assertEqual(widget._handle_custom_msg.call_count, 2)
@@ -2,35 +2,102 @@
 # Distributed under the terms of the Modified BSD License.
 import time
 import logging
+from contextlib import contextmanager
 
 from ipywidgets import widgets  # Widget definitions
+from IPython.core.getipython import get_ipython
 import traceback
 
+from .util.idle import idle_scheduler
+from .util.names import name_resolver
+from .util.sharing import shared_results
+
 class UrthWidget(widgets.Widget):
     """ A base class for Urth widgets. """
 
     def __init__(self, **kwargs):
+        # state updates held back to be sent together, see hold_updates()
+        self._held_state = None
         super(UrthWidget, self).__init__(**kwargs)
 
+    def _handle_msg(self, msg):
+        # requests from the front-end take precedence over idle work
+        idle_scheduler().request()
+        super(UrthWidget, self)._handle_msg(msg)
+
     def get_state(self, key=None):
         """
         In general, urth widgets don't have initial state
         """
         return {}
 
+    @contextmanager
+    def hold_updates(self):
+        """
+        Holds back the state updates and status sent within the context, and
+        sends them together in a single update message when it exits, so the
+        front-end handles them as one change. Nested contexts send their
+        updates with the outermost one.
+
+        Examples
+        --------
+        >>> with widget.hold_updates():
+        ...     widget._send_update("value", value)
+        ...     widget.ok()
+        """
+        if self._held_state is not None:
+            yield
+            return
+
+        self._held_state = {}
+        try:
+            yield
+        finally:
+            state, self._held_state = self._held_state, None
+            if state:
+                self._send_state(state)
+
+    def _invalidate_caches(self):
+        """
+        Discards the kernel-side caches shared by widgets after user code
+        invoked from the front-end ran, e.g. a function or a watch handler,
+        since it may have changed data in ways fingerprints miss or rebound
+        the names widgets are bound to.
+        """
+        shell = get_ipython()
+        if shell is not None:
+            shared_results(shell).invalidate()
+            name_resolver(shell).invalidate()
+
     def _send_update(self, attribute, value):
         """
         Sends a message to update the front-end state of the given attribute.
         """
-        msg = {
+        self._send_state({attribute: value})
+
+    def _send_state(self, state):
+        """
+        Sends a message to update the front-end state of the given attributes,
+        or adds them to the held update, see `hold_updates`. A held error
+        status is kept over a later ok status, so the front-end still shows
+        errors reported by steps followed by `ok()`.
+        """
+        if self._held_state is not None:
+            held = self._held_state.get("__status__")
+            new = state.get("__status__")
+            if held is not None and new is not None and \
+                    held["status"] == "error" and new["status"] == "ok":
+                state = dict(state)
+                del state["__status__"]
+            self._held_state.update(state)
+            return
+
+        self._send({
             "method": "update",
-            "state": {
-                attribute: value
-            }
-        }
-        self._send(msg)
+            "state": state
+        })
 
-    def send_status(self, status, msg=""):
+    def send_status(self, status, msg="", **kwargs):
         """
         Sends a message to inform the front-end of the execution status.
 
@@ -40,34 +107,37 @@ class UrthWidget(widgets.Widget):
             "ok" for success, "error" for failure.
         msg : string
             Message accompanying the status, e.g. an error message.
+        **kwargs : dict
+            Additional fields of the status, e.g. performance stats.
         """
-        self._send({
-            "method": "update",
-            "state": {
-                "__status__": {
-                    "status": status,
-                    "msg": msg,
-                    "timestamp": round(time.time() * 1000)
-                }
-            }
-        })
+        status = {
+            "status": status,
+            "msg": msg,
+            "timestamp": round(time.time() * 1000)
+        }
+        status.update(kwargs)
+        self._send_state({"__status__": status})
 
-    def error(self, error):
+    def error(self, error, **kwargs):
         """
         Inform the front-end that an error occurred, with the given error msg.
         Parameters
         ----------
         error: string or exception
+        **kwargs : dict
+            Additional fields of the status.
         """
-        self.send_status("error", str(error))
+        self.send_status("error", str(error), **kwargs)
         self.log.error(traceback.format_exc())
 
-    def ok(self, msg=""):
+    def ok(self, msg="", **kwargs):
         """
         Inform the front-end that processing succeeded.
         Parameters
         ----------
         msg : string
             An optional message.
+        **kwargs : dict
+            Additional fields of the status.
         """
-        self.send_status("ok", msg)
\ No newline at end of file
+        self.send_status("ok", msg, **kwargs)
\ No newline at end of file
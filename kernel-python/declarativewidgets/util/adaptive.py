@@ -0,0 +1,100 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Row limits adapted to a latency or size budget.
+
+A fixed row limit is too small for narrow DataFrames and too big for wide
+ones. Widgets given a budget instead measure the time it takes to serialize
+and encode each row they send, and the encoded size of each row, and pick
+the number of rows that fits the budget for the next value they send.
+"""
+
+import json
+import time
+
+# Bounds of the adapted limits.
+min_limit = 1
+max_limit = 100000
+
+# Weight of the latest measurement in the per row estimates.
+smoothing = 0.5
+
+
+class AdaptiveLimit(object):
+    """ Estimates the cost of each row sent to pick a row limit within a
+    budget.
+
+    Examples
+    --------
+    >>> adaptive = AdaptiveLimit()
+    >>> limit = adaptive.limit(100, latency_budget=50)
+    >>> serialized = serializer.serialize(df, limit=limit)
+    >>> adaptive.measure(len(serialized['data']), seconds, serialized)
+    """
+
+    def __init__(self):
+        self.seconds_per_row = None
+        self.bytes_per_row = None
+
+    def measure(self, rows, seconds, payload=None):
+        """Adds a measurement of the rows of a value sent.
+
+        Parameters
+        ----------
+        rows : int
+            Number of rows sent. Measurements without rows are ignored.
+        seconds : float
+            Time taken to serialize the rows.
+        payload : object
+            The serialized value. If given, it is encoded to measure its size,
+            and the time taken is added to `seconds`.
+        """
+        if not rows:
+            return
+
+        if payload is not None:
+            start = time.time()
+            size = len(json.dumps(payload, default=repr))
+            seconds += time.time() - start
+            self.bytes_per_row = _smooth(self.bytes_per_row, float(size) / rows)
+        self.seconds_per_row = _smooth(self.seconds_per_row, seconds / rows)
+
+    def limit(self, default, latency_budget=0, byte_budget=0):
+        """Returns the number of rows fitting the budgets.
+
+        Parameters
+        ----------
+        default : int
+            Limit used until the cost of rows is measured.
+        latency_budget : float
+            Milliseconds to spend serializing and encoding the rows, or 0.
+        byte_budget : int
+            Maximum encoded size of the rows, or 0.
+        """
+        limits = []
+        if latency_budget and self.seconds_per_row:
+            limits.append(latency_budget / 1000.0 / self.seconds_per_row)
+        if byte_budget and self.bytes_per_row:
+            limits.append(byte_budget / self.bytes_per_row)
+        if not limits:
+            return default
+        return int(max(min_limit, min(max_limit, min(limits))))
+
+
+    def enabled(self, widget):
+        """Returns True if a widget, with `latency_budget` and `byte_budget`
+        attributes, has a budget set."""
+        return bool(widget.latency_budget or widget.byte_budget)
+
+    def widget_limit(self, widget):
+        """Returns the number of rows a widget sends: its `limit`, or the
+        number of rows fitting its budgets if set."""
+        if not self.enabled(widget):
+            return widget.limit
+        return self.limit(widget.limit, widget.latency_budget, widget.byte_budget)
+
+
+def _smooth(estimate, value):
+    if estimate is None:
+        return value
+    return smoothing * value + (1 - smoothing) * estimate
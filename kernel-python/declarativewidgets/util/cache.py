@@ -0,0 +1,76 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Bounded caches used by the widgets to keep kernel side state. """
+
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """ A mapping that holds at most `maxsize` entries, evicting the least
+    recently used entry when full. If `ttl` is given, entries also expire
+    `ttl` seconds after they are stored.
+
+    Examples
+    --------
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache['c'] = 3
+    >>> 'a' in cache
+    False
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._expires = {}
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=None):
+        self._expires.pop(key, None)
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+        self._expires.clear()
+
+    def items(self):
+        """Returns the (key, value) pairs, least recently used first."""
+        return [(k, v) for k, v in list(self._data.items()) if not self._expired(k)]
+
+    def _expired(self, key):
+        expires = self._expires.get(key)
+        if expires is None or expires > time.time():
+            return False
+        self.pop(key)
+        return True
+
+    def __getitem__(self, key):
+        if self._expired(key):
+            raise KeyError(key)
+        value = self._data.pop(key)
+        self._data[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        if self.ttl is not None:
+            self._expires[key] = time.time() + self.ttl
+        while len(self._data) > self.maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            self._expires.pop(evicted, None)
+
+    def __contains__(self, key):
+        return key in self._data and not self._expired(key)
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,138 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Utilities for running widget handlers off the kernel's message loop.
+
+Work is either scheduled as a coroutine on the kernel's event loop,
+dispatched to a shared, bounded thread pool, or to a worker process dedicated
+to the widget making the call, so it can be killed without failing the calls
+of other widgets. All return futures
+that can be handed to `IOLoop.add_future` so completion is handled back on the
+kernel's event loop, where it is safe to send comm messages.
+"""
+
+import inspect
+import pickle
+import threading
+
+try:
+    # Pickles functions defined in the notebook by value, which the standard
+    # pickle cannot send to another process.
+    import cloudpickle as _pickler
+except ImportError:
+    _pickler = pickle
+
+# Maximum number of threads used to run handlers.
+thread_pool_size = 4
+
+_thread_pool = None
+
+# Holds the cancellation event of the call running in a pool thread
+_local = threading.local()
+
+
+def thread_pool():
+    """Returns the shared thread pool, creating it on first use.
+
+    Returns
+    -------
+    concurrent.futures.ThreadPoolExecutor
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        # concurrent.futures requires the futures backport in Python 2.
+        from concurrent.futures import ThreadPoolExecutor
+        _thread_pool = ThreadPoolExecutor(max_workers=thread_pool_size)
+    return _thread_pool
+
+
+def process_worker():
+    """Returns a new executor running calls one at a time in a single worker
+    process, to be dedicated to one widget.
+
+    Returns
+    -------
+    concurrent.futures.ProcessPoolExecutor
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=1)
+
+
+def terminate_process_worker(worker):
+    """Kills the process of an executor returned by `process_worker`, failing
+    the call it is running, and shuts the executor down.
+    """
+    processes = getattr(worker, '_processes', None) or {}
+    for process in list(processes.values()):
+        process.terminate()
+    worker.shutdown(wait=False)
+
+
+def run_cancellable(event, fn, *args):
+    """Runs a call in a pool thread, letting it check whether `event` is set
+    with `cancelled()`.
+    """
+    _local.cancel_event = event
+    try:
+        return fn(*args)
+    finally:
+        _local.cancel_event = None
+
+
+def cancelled():
+    """Returns True if the call running in the current thread was cancelled.
+
+    Threads cannot be interrupted, so long running functions run in the
+    thread pool should check this periodically and return early.
+
+    Examples
+    --------
+    >>> def crunch(n: int):
+    ...     for chunk in chunks(n):
+    ...         if cancelled():
+    ...             return None
+    ...         process(chunk)
+    """
+    event = getattr(_local, 'cancel_event', None)
+    return event is not None and event.is_set()
+
+
+def pickle_call(func, *args, **kwargs):
+    """Pickles a function call to run it in a worker process.
+
+    Raises
+    ------
+    Exception
+        If the function or arguments cannot be pickled, e.g. a lambda without
+        cloudpickle installed, or an argument holding a lock or connection.
+    """
+    return _pickler.dumps((func, args, kwargs))
+
+
+def call_pickled(payload):
+    """Runs a function call pickled with `pickle_call`."""
+    func, args, kwargs = pickle.loads(payload)
+    return func(*args, **kwargs)
+
+
+def is_coroutine_function(func):
+    """Returns True if `func` is defined with `async def`."""
+    iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', None)
+    return iscoroutinefunction is not None and iscoroutinefunction(func)
+
+
+def to_future(coro):
+    """Schedules a coroutine on the current event loop.
+
+    Parameters
+    ----------
+    coro : coroutine
+        The coroutine object to run.
+
+    Returns
+    -------
+    Future
+        A future resolved with the result of the coroutine.
+    """
+    from tornado.gen import convert_yielded
+    return convert_yielded(coro)
@@ -3,8 +3,12 @@
 
 """ Utilities related to functions. """
 
+import functools
 import inspect
 import json
+import weakref
+
+from .cache import LRUCache
 
 try:
     from inspect import signature # Python >=3.3 supports inspect.signature, Python 2.7 does not
@@ -40,11 +44,159 @@ def apply_with_conversion(func, args):
     >> 3
 
     """
-    spec = parameter_types(func)
-    converted = convert_args(args, spec)
+    return func(**converted_args(func, args))
+
+
+def converted_args(func, args):
+    """ Convert arguments to the types inferred from the function's signature.
+
+    Parameters
+    ==========
+    func: function
+        The function the arguments are for.
+    args: dict
+        Mapping of argument name to argument value, in unconverted form.
+
+    Returns
+    =======
+    converted: dict
+        Mapping of argument name to typed argument value, excluding names
+        that are not parameters of the function.
+    """
+    return function_spec(func).convert(args)
+
+
+def batched(func):
+    """ Decorator marking a function as vectorized.
+
+    A batched function is written for lists: each parameter receives the list
+    of its values for a batch of calls, and the function returns the list of
+    their results. Types are still inferred from the defaults and annotations
+    of single values. A batched `urth-core-function` target is called once per
+    batch invocation instead of once per call.
+
+    Examples
+    ========
+    >> @batched
+    >> def score(item: str):
+    >>     return model.predict(item)
+
+    """
+    func.__batched__ = True
+    return func
+
+
+def is_batched(func):
+    return bool(getattr(func, '__batched__', False))
+
+
+def apply_converted(func, converted):
+    """ Apply the function to converted arguments, as a batch of one call if
+    the function is batched.
+    """
+    if is_batched(func):
+        return apply_batch(func, [converted])[0]
     return func(**converted)
 
 
+def apply_batch(func, converted_list):
+    """ Apply the function to each set of converted arguments.
+
+    Parameters
+    ==========
+    func: function
+        The function to apply. Batched functions are called once with the
+        list of values of each parameter, using the default value of
+        parameters missing from a call.
+    converted_list: list
+        Mappings of argument name to typed argument value, one per call.
+
+    Returns
+    =======
+    results: list
+        The result of each call.
+    """
+    if not is_batched(func):
+        return [func(**converted) for converted in converted_list]
+
+    spec = function_spec(func)
+    columns = {}
+    for name in spec.types:
+        values = []
+        for i, converted in enumerate(converted_list):
+            if name in converted:
+                values.append(converted[name])
+            elif name in spec.defaults:
+                values.append(spec.defaults[name])
+            else:
+                raise TypeError("Missing required argument {} for call {} of "
+                                "the batch.".format(name, i))
+        columns[name] = values
+
+    results = list(func(**columns))
+    if len(results) != len(converted_list):
+        raise ValueError("Batched function returned {} results for {} "
+                         "calls.".format(len(results), len(converted_list)))
+    return results
+
+
+def args_key(args):
+    """ Returns a hashable key identifying a set of converted arguments. """
+    return json.dumps(args, sort_keys=True, default=repr)
+
+
+_missing = object()
+
+
+def memoize(maxsize=128, ttl=None):
+    """ Decorator caching the results of a function by its arguments.
+
+    Calls with the same arguments, e.g. repeated invocations from an
+    `urth-core-function`, return the cached result instead of calling the
+    function again. Arguments are compared by their JSON encoding.
+
+    Parameters
+    ==========
+    maxsize: int
+        Maximum number of results to cache. The least recently used result is
+        evicted when full.
+    ttl: float
+        Number of seconds a result is cached for. Results never expire if None.
+
+    Returns
+    =======
+    decorator: function
+        Wraps a function. The wrapper has a `cache_clear()` method to discard
+        the cached results, e.g. when the data they are computed from changes.
+
+    Examples
+    ========
+    >> @memoize(maxsize=32, ttl=60)
+    >> def lookup(name: str):
+    >>     return expensive_query(name)
+
+    >> lookup.cache_clear()
+
+    """
+    def decorator(func):
+        cache = LRUCache(maxsize, ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args_key([args, kwargs])
+            result = cache.get(key, _missing)
+            if result is _missing:
+                result = cache[key] = func(*args, **kwargs)
+            return result
+
+        # functools.wraps only sets it on Python 3
+        wrapper.__wrapped__ = func
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
 def signature_spec(func):
     """ Detect parameter types and give the corresponding JavaScript type name.
 
@@ -72,39 +224,7 @@ def signature_spec(func):
     >> {'a' : {'type': 'Number'}}
 
     """
-    types = parameter_types(func)
-    names = {}
-    for (param, tpe) in types.items():
-        names[param] = {}
-        if tpe == int or tpe == float:
-            names[param]['type'] = "Number"
-        elif tpe == str:
-            names[param]['type'] = "String"
-        elif tpe == bool:
-            names[param]['type'] = "Boolean"
-        elif tpe == list:
-            names[param]['type'] = "Array"
-        elif tpe == dict:
-            names[param]['type'] = "Object"
-        else:
-            if tpe.__module__ == "builtins":
-                names[param]['type'] = tpe.__name__
-            else:
-                names[param]['type'] = tpe.__module__ + "." + tpe.__name__
-
-    # marked required parameters
-    for param in required_parameter(func):
-        names[param]['required'] = True
-
-    try:
-        default_values = get_default_vals(func)
-    except NameError:
-        default_values = default_parameters(func)
-
-    for param, value in default_values.items():
-        names[param]['value'] = value
-
-    return names
+    return function_spec(func).signature()
 
 
 def convert_args(args, spec):
@@ -116,24 +236,133 @@ def convert_args(args, spec):
 
 
 def _convert(val, tpe, name):
+    return _converter(tpe, name)(val)
+
+
+# Conversions from the front-end's argument values to inferred types
+_conversions = {
+    int: int,
+    float: float,
+    bool: bool,
+    str: str,
+    list: json.loads,
+    dict: json.loads
+}
+
+
+def _converter(tpe, name):
+    """ Returns a function converting a value to the type of a parameter. """
+    conversion = _conversions.get(tpe)
+    if conversion is None:
+        return lambda val: val
+
+    def converter(val):
+        try:
+            return conversion(val)
+        except ValueError:
+            raise ValueError("Value {} could not be converted to inferred type {} "
+                             "for argument {}.".format(val, tpe, name))
+        except TypeError:
+            raise TypeError(
+                "Value {} of type {} could not be converted to inferred "
+                "type {} for argument {}.".format(val, type(val), tpe, name))
+    return converter
+
+
+def _js_type_name(tpe):
+    if tpe == int or tpe == float:
+        return "Number"
+    elif tpe == str:
+        return "String"
+    elif tpe == bool:
+        return "Boolean"
+    elif tpe == list:
+        return "Array"
+    elif tpe == dict:
+        return "Object"
+    elif tpe.__module__ == "builtins":
+        return tpe.__name__
+    else:
+        return tpe.__module__ + "." + tpe.__name__
+
+
+class FunctionSpec(object):
+    """ The inferred parameters of a function and the converters for their
+    arguments, computed once so invocations do not inspect the function.
+    """
+
+    def __init__(self, func):
+        self.types = parameter_types(func)
+        self.required = required_parameter(func)
+        try:
+            self.defaults = get_default_vals(func)
+        except NameError:
+            self.defaults = default_parameters(func)
+        self.converters = dict((name, _converter(tpe, name))
+                               for (name, tpe) in self.types.items())
+        self._version = _version(func)
+        self._signature = None
+
+    def is_current(self, func):
+        """Returns False if the function was redefined in place since."""
+        return all(a is b for a, b in zip(self._version, _version(func)))
+
+    def convert(self, args):
+        converted = {}
+        for (name, val) in args.items():
+            if name in self.converters:
+                converted[name] = self.converters[name](val)
+        return converted
+
+    def signature(self):
+        if self._signature is None:
+            names = {}
+            for (param, tpe) in self.types.items():
+                names[param] = {'type': _js_type_name(tpe)}
+
+            # marked required parameters
+            for param in self.required:
+                names[param]['required'] = True
+
+            for param, value in self.defaults.items():
+                names[param]['value'] = value
+
+            self._signature = names
+
+        return dict((param, dict(info)) for (param, info) in self._signature.items())
+
+
+def _version(func):
+    func = getattr(func, '__func__', func)
+    return (getattr(func, '__code__', None),
+            getattr(func, '__defaults__', None),
+            getattr(func, '__kwdefaults__', None))
+
+
+# Specs of functions, and of the functions underlying bound methods, which
+# are dropped along with the function
+_specs = weakref.WeakKeyDictionary()
+_method_specs = weakref.WeakKeyDictionary()
+
+
+def function_spec(func):
+    """ Returns the spec of a function, computing it on first use.
+
+    Specs are cached by function object, so a name rebound to a new function
+    gets a new spec. Bound methods share the spec of their function.
+    """
+    key = getattr(func, '__func__', None)
+    specs = _method_specs
+    if key is None:
+        key = func
+        specs = _specs
+
     try:
-        if tpe == int:
-            val = int(val)
-        elif tpe == float:
-            val = float(val)
-        elif tpe == bool:
-            val = bool(val)
-        elif tpe == str:
-            val = str(val)
-        elif tpe == list:
-            val = json.loads(val)
-        elif tpe == dict:
-            val = json.loads(val)
-    except ValueError:
-        raise ValueError("Value {} could not be converted to inferred type {} "
-                         "for argument {}.".format(val, tpe, name))
+        spec = specs.get(key)
     except TypeError:
-        raise TypeError(
-            "Value {} of type {} could not be converted to inferred "
-            "type {} for argument {}.".format(val, type(val), tpe, name))
-    return val
+        # not weakly referenceable, e.g. a builtin
+        return FunctionSpec(func)
+
+    if spec is None or not spec.is_current(func):
+        spec = specs[key] = FunctionSpec(func)
+    return spec
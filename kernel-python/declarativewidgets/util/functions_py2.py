@@ -6,6 +6,9 @@
 import inspect
 
 def get_arg_spec(func):
+    # inspect the function decorated with functools.wraps, e.g. by memoize
+    while hasattr(func, '__wrapped__'):
+        func = func.__wrapped__
     sig = inspect.getargspec(func)
     if "self" in sig.args:
         sig.args.remove("self")
@@ -0,0 +1,100 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Scheduling of work for when the kernel is idle.
+
+Speculative work, e.g. prefetching the data the user is likely to ask for
+next, is scheduled on the `IdleScheduler`. Tasks run one at a time on the
+kernel's event loop once no request was received from the front-end for
+`idle_delay` seconds, so requests, which postpone the tasks, are handled
+between them and are never queued behind more than one.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+
+from tornado.ioloop import IOLoop
+
+# Number of seconds without requests before idle tasks run.
+idle_delay = 0.1
+
+# Maximum number of tasks waiting to run. The oldest are dropped when full.
+max_tasks = 64
+
+_scheduler = None
+
+
+def idle_scheduler():
+    """Returns the scheduler shared by the widgets of the kernel.
+
+    Returns
+    -------
+    IdleScheduler
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = IdleScheduler()
+    return _scheduler
+
+
+class IdleScheduler(object):
+    """ Runs tasks one at a time on the event loop while the kernel is idle.
+
+    Examples
+    --------
+    >>> idle_scheduler().schedule(('prefetch', model_id), prefetch)
+    """
+
+    def __init__(self, loop=None):
+        self._loop = loop or IOLoop.current()
+        self._tasks = OrderedDict()
+        self._timer = None
+        self._last_request = 0
+
+    def schedule(self, key, task):
+        """Schedules a task, replacing the one scheduled with the same key.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the task, e.g. by widget and purpose.
+        task : callable
+            Called without arguments. Errors are logged.
+        """
+        self._tasks.pop(key, None)
+        self._tasks[key] = task
+        while len(self._tasks) > max_tasks:
+            self._tasks.popitem(last=False)
+        self._start()
+
+    def cancel(self, key):
+        """Cancels the task scheduled with a key, if any."""
+        self._tasks.pop(key, None)
+
+    def request(self):
+        """Notes a request from the front-end, postponing the tasks."""
+        self._last_request = time.time()
+
+    def pending(self):
+        """Returns the number of tasks waiting to run."""
+        return len(self._tasks)
+
+    def _start(self):
+        if self._timer is None and self._tasks:
+            self._timer = self._loop.call_later(idle_delay, self._run)
+
+    def _run(self):
+        self._timer = None
+        wait = self._last_request + idle_delay - time.time()
+        if wait > 0:
+            self._timer = self._loop.call_later(wait, self._run)
+            return
+
+        if self._tasks:
+            key, task = self._tasks.popitem(last=False)
+            try:
+                task()
+            except Exception:
+                logging.getLogger(__name__).exception("Idle task {} failed".format(key))
+        self._start()
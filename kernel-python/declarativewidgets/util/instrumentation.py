@@ -0,0 +1,257 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Performance instrumentation of the widgets.
+
+Widgets time the phases of handling each message (e.g. name resolution,
+query, serialization and send) using a `Trace`. When instrumentation is
+enabled, finished traces are aggregated into per widget and per channel
+variable counts and latency histograms, retrieved with `stats()`.
+
+Examples
+--------
+>>> enable_stats()
+>>> # ... interact with the dashboard ...
+>>> stats()['widgets']
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+from .cache import LRUCache
+
+# Whether finished traces are aggregated. Disabled by default since measuring
+# payload sizes requires encoding each payload an extra time.
+enabled = False
+
+# Whether the aggregated stats of a widget are sent along with its status.
+include_in_status = False
+
+# Maximum number of widgets and channel variables with aggregated stats.
+max_targets = 1024
+
+_targets = LRUCache(max_targets)
+
+
+def enable_stats(include_status=False):
+    """Starts aggregating stats of the widgets and channels.
+
+    Parameters
+    ----------
+    include_status : boolean
+        Also send the aggregated stats of a widget to the front-end in its
+        `__status__` message.
+    """
+    global enabled, include_in_status
+    enabled = True
+    include_in_status = include_status
+
+
+def disable_stats():
+    """Stops aggregating stats of the widgets and channels."""
+    global enabled, include_in_status
+    enabled = False
+    include_in_status = False
+
+
+def reset_stats():
+    """Discards all aggregated stats."""
+    _targets.clear()
+
+
+def stats():
+    """Returns the aggregated stats.
+
+    Returns
+    -------
+    dict
+        With a `widgets` entry mapping widget model ids, and a `channels`
+        entry mapping "channel:variable" names, to their stats. Stats contain
+        the `count` of messages handled, a latency histogram in milliseconds
+        for each phase and a histogram of payload sizes in bytes.
+    """
+    result = {'widgets': {}, 'channels': {}}
+    for (kind, key), target in _targets.items():
+        if kind == 'Channel':
+            result['channels'][key] = target.as_dict()
+        else:
+            result['widgets'][key] = target.as_dict()
+    return result
+
+
+class Histogram(object):
+    """ Counts of values falling within fixed bucket bounds. """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self):
+        labels = ['<={}'.format(b) for b in self.bounds] + ['>{}'.format(self.bounds[-1])]
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0,
+            'min': self.min,
+            'max': self.max,
+            'buckets': dict(zip(labels, self.buckets))
+        }
+
+
+# Bucket bounds for latencies in milliseconds and payload sizes in bytes
+LATENCY_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+BYTES_BOUNDS = (1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20)
+
+
+class TargetStats(object):
+    """ The aggregated stats of a widget or channel variable. """
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.count = 0
+        self.phases = {}
+        self.bytes = Histogram(BYTES_BOUNDS)
+
+    def add(self, trace):
+        self.name = trace.name
+        self.count += 1
+        for phase, seconds in trace.phases.items():
+            if phase not in self.phases:
+                self.phases[phase] = Histogram(LATENCY_BOUNDS)
+            self.phases[phase].add(seconds * 1000)
+        if trace.bytes is not None:
+            self.bytes.add(trace.bytes)
+
+    def as_dict(self):
+        return {
+            'type': self.kind,
+            'name': self.name,
+            'count': self.count,
+            'phases': dict((p, h.as_dict()) for p, h in self.phases.items()),
+            'bytes': self.bytes.as_dict()
+        }
+
+
+class Trace(object):
+    """ Timings of the phases of handling a single message.
+
+    Parameters
+    ----------
+    kind : string
+        The kind of target, e.g. "DataFrame" or "Channel".
+    name : string
+        The name the target is bound to, e.g. a variable name.
+    key : object
+        Identifies the target, e.g. a widget model id. Defaults to `name`.
+    detailed : boolean
+        Send the timing breakdown of this trace to the front-end in the
+        `__status__` message of the target, even if stats are disabled.
+
+    Examples
+    --------
+    >>> trace = Trace('DataFrame', 'df', widget.model_id)
+    >>> with trace.phase('serialize'):
+    ...     serialized = serializer.serialize(df)
+    >>> trace.payload(serialized)
+    >>> trace.finish()
+    """
+
+    def __init__(self, kind, name, key=None, detailed=False):
+        self.kind = kind
+        self.name = name
+        self.key = name if key is None else key
+        self.detailed = detailed
+        self.phases = {}
+        self.bytes = None
+        self.rows_in = None
+        self.rows_out = None
+
+    @contextmanager
+    def phase(self, name):
+        """Times the enclosed block as the given phase."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.time() - start)
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def rows(self, rows_in=None, rows_out=None):
+        """Records the number of rows of the input and output data."""
+        if rows_in is not None:
+            self.rows_in = rows_in
+        if rows_out is not None:
+            self.rows_out = rows_out
+
+    def payload(self, obj):
+        """Records the encoded size of a payload sent to the front-end."""
+        if enabled or self.detailed:
+            self.bytes = len(json.dumps(obj, default=repr))
+
+    def finish(self):
+        """Aggregates this trace into the stats of its target, if enabled."""
+        if not enabled:
+            return
+
+        target_key = (self.kind, self.key)
+        target = _targets.get(target_key)
+        if target is None:
+            target = _targets[target_key] = TargetStats(self.kind, self.name)
+        target.add(self)
+
+    def as_dict(self):
+        """Returns the phase timings in milliseconds, row counts and bytes."""
+        result = dict((p, round(s * 1000, 3)) for p, s in self.phases.items())
+        result.update({
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes': self.bytes
+        })
+        return result
+
+    def status(self):
+        """Returns extra fields for the `__status__` message of the target."""
+        status = {}
+        if enabled and include_in_status and (self.kind, self.key) in _targets:
+            status['stats'] = _targets[(self.kind, self.key)].as_dict()
+        if self.detailed:
+            status['timing'] = self.as_dict()
+        return status
+
+
+def row_count(obj):
+    """Returns the number of rows of a data object if cheaply known.
+
+    Avoids objects such as Spark DataFrames whose size requires computation.
+    """
+    shape = getattr(obj, 'shape', None)
+    if isinstance(shape, tuple) and shape:
+        return shape[0]
+    if isinstance(obj, (list, tuple)):
+        return len(obj)
+    return None
+
+
+def serialized_row_count(serialized):
+    """Returns the number of rows in a serialized DataFrame, if it is one."""
+    if isinstance(serialized, dict) and isinstance(serialized.get('data'), list):
+        return len(serialized['data'])
+    return None
@@ -0,0 +1,81 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Resolution of the names widgets are bound to.
+
+Widgets refer to kernel objects by dotted names, e.g. "df" or "model.score",
+resolved against the user namespace. A `NameResolver` caches the resolved
+objects, so widgets syncing repeatedly do not walk the attributes each time.
+The cache is trusted until it is cleared, which happens after each execution
+and after functions and watch handlers invoked from the front-end ran, i.e.
+whenever user code may have rebound names. Only the root name is checked on
+each lookup, since it is a cheap namespace lookup made anyway.
+"""
+
+from functools import reduce
+
+from .cache import LRUCache
+
+# Maximum number of resolved names kept between executions.
+max_names = 1024
+
+_resolver = None
+
+
+def name_resolver(shell):
+    """Returns the resolver shared by the widgets of a shell.
+
+    Parameters
+    ----------
+    shell : InteractiveShell
+        The shell whose user namespace names are resolved against.
+
+    Returns
+    -------
+    NameResolver
+    """
+    global _resolver
+    if _resolver is None or _resolver.shell is not shell:
+        _resolver = NameResolver(shell)
+    return _resolver
+
+
+class NameResolver(object):
+    """ Resolves dotted names in the user namespace of a shell, caching the
+    resolved objects until the next execution.
+
+    Examples
+    --------
+    >>> resolver = NameResolver(get_ipython())
+    >>> resolver.resolve('model.score')
+    """
+
+    def __init__(self, shell):
+        self.shell = shell
+        self._cache = LRUCache(max_names)
+        shell.events.register('post_execute', self.invalidate)
+
+    def resolve(self, name):
+        """Returns the object bound to a dotted name.
+
+        Raises
+        ------
+        KeyError
+            If the root name is not defined.
+        AttributeError
+            If an attribute along the name is not defined.
+        """
+        path = name.split('.')
+        root = self.shell.user_ns[path[0]]
+
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] is root:
+            return cached[1]
+
+        value = reduce(getattr, path[1:], root)
+        self._cache[name] = (root, value)
+        return value
+
+    def invalidate(self, *args):
+        """Discards all resolved names."""
+        self._cache.clear()
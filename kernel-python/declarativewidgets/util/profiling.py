@@ -0,0 +1,132 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" On-demand profiling of widget handlers.
+
+`profile()` requests that the next executions of a widget's handlers (a
+DataFrame sync, a Function invoke or a channel watch handler) run under
+cProfile. The widgets check for pending requests around each execution, so no
+change to the user's code is needed.
+
+Examples
+--------
+>>> p = profile('df', n_calls=3)
+>>> # ... interact with the elements bound to df ...
+>>> p.print_stats()
+"""
+
+import cProfile
+import pstats
+import threading
+from contextlib import contextmanager
+
+# Profile requests that have not completed their calls yet
+_requests = []
+_lock = threading.Lock()
+
+
+def profile(target, n_calls=1):
+    """Profiles the next `n_calls` handler executions of a widget.
+
+    Parameters
+    ----------
+    target : widget or string
+        A DataFrame, Function or Channels widget instance, or the name it is
+        bound to: a variable name, a function name or "channel:variable" for
+        channel watch handlers.
+    n_calls : int
+        Number of executions to profile.
+
+    Returns
+    -------
+    Profile
+        Accumulates the profile of the executions. Coroutine functions and
+        watch handlers, generator functions and functions run in a worker
+        process are not profiled.
+    """
+    request = Profile(target, n_calls)
+    with _lock:
+        _requests.append(request)
+    return request
+
+
+class Profile(object):
+    """ The aggregated profile of the executions of a widget's handlers. """
+
+    def __init__(self, target, n_calls):
+        self.target = target
+        self.n_calls = n_calls
+        self.calls = 0
+        self._profiler = cProfile.Profile()
+
+    @property
+    def done(self):
+        return self.calls >= self.n_calls
+
+    def matches(self, widget, names):
+        return self.target is widget or self.target in names
+
+    def stats(self, sort='cumulative'):
+        """Returns the aggregated `pstats.Stats`, or None if nothing ran yet."""
+        if not self.calls:
+            return None
+        return pstats.Stats(self._profiler).sort_stats(sort)
+
+    def print_stats(self, limit=20, sort='cumulative'):
+        """Prints the functions that took the most time."""
+        stats = self.stats(sort)
+        if stats is None:
+            print("No calls profiled yet.")
+        else:
+            stats.print_stats(limit)
+
+    def cancel(self):
+        """Stops profiling further executions."""
+        with _lock:
+            if self in _requests:
+                _requests.remove(self)
+
+    def __repr__(self):
+        return "<Profile of {!r}: {}/{} calls>".format(
+            self.target, self.calls, self.n_calls)
+
+
+def _take(widget, names):
+    """Returns the first pending request matching the widget, if any."""
+    if not _requests:
+        return None
+    with _lock:
+        for request in _requests:
+            if request.matches(widget, names):
+                request.calls += 1
+                if request.done:
+                    _requests.remove(request)
+                return request
+    return None
+
+
+@contextmanager
+def profiled(widget, *names):
+    """Runs the enclosed block under a pending profile request for the widget
+    or any of the given names.
+    """
+    request = _take(widget, names)
+    if request is None:
+        yield
+        return
+
+    request._profiler.enable()
+    try:
+        yield
+    finally:
+        request._profiler.disable()
+
+
+def wrap(func, widget, *names):
+    """Returns `func` wrapped to run under a pending profile request for the
+    widget or any of the given names when called, e.g. in another thread.
+    """
+    def wrapper(*args, **kwargs):
+        with profiled(widget, *names):
+            return func(*args, **kwargs)
+    return wrapper
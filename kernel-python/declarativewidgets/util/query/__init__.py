@@ -1,14 +1,22 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
 
-# Setting up query support
+import hashlib
+
+# Setting up query and fingerprint support
 
 query_support_map = {}
+fingerprint_support_map = {}
+offset_support_map = {}
 
 try:
     from pandas import DataFrame
     from .pandas import apply_query as pandas_apply_query
+    from .pandas import fingerprint as pandas_fingerprint
+    from .pandas import apply_offset as pandas_apply_offset
     query_support_map[DataFrame] = pandas_apply_query
+    fingerprint_support_map[DataFrame] = pandas_fingerprint
+    offset_support_map[DataFrame] = pandas_apply_offset
 except ImportError:
     # TODO: LOG WARNING
     pass
@@ -16,11 +24,78 @@ except ImportError:
 try:
     import pyspark
     from .spark import apply_query as spark_apply_query
+    from .spark import fingerprint as spark_fingerprint
+    from .spark import apply_offset as spark_apply_offset
     query_support_map[pyspark.sql.DataFrame] = spark_apply_query
+    fingerprint_support_map[pyspark.sql.DataFrame] = spark_fingerprint
+    offset_support_map[pyspark.sql.DataFrame] = spark_apply_offset
 except ImportError:
     # TODO: LOG WARNING
     pass
 
 
 def apply_query(df, query):
-    return query_support_map[type(df)](df, query) if type(df) in query_support_map else df
\ No newline at end of file
+    return query_support_map[type(df)](df, query) if type(df) in query_support_map else df
+
+
+def apply_offset(df, offset):
+    """
+    Skips the first `offset` rows of a DataFrame, or items of a sequence, so
+    a window of the data can be serialized.
+    """
+    if not offset:
+        return df
+    if type(df) in offset_support_map:
+        return offset_support_map[type(df)](df, offset)
+    if isinstance(df, (list, tuple)):
+        return df[offset:]
+    return df
+
+
+def reverse_sort(query):
+    """
+    Returns the query with the order of its last sort reversed, or None if
+    it does not sort.
+    """
+    for i in reversed(range(len(query))):
+        if query[i].get('type') == 'sort':
+            expr = dict(query[i]['expr'])
+            ascending = expr.get('ascending', True)
+            expr['ascending'] = [not a for a in ascending] \
+                if isinstance(ascending, list) else not ascending
+            item = dict(query[i], expr=expr)
+            return query[:i] + [item] + query[i + 1:]
+    return None
+
+
+def fingerprint(df, samples=16):
+    """
+    Computes a cheap fingerprint of a DataFrame, or other data, that changes
+    when it is rebound or changed, e.g. to decide whether a cached or sent
+    result is stale. Registered types compute it from metadata. Others fall
+    back to their identity, length and a hash of up to `samples` evenly spaced
+    items, for sequences, so changes outside the sampled items can be missed.
+    """
+    if type(df) in fingerprint_support_map:
+        return fingerprint_support_map[type(df)](df)
+    return default_fingerprint(df, samples)
+
+
+def detects_changes(df):
+    """
+    Returns True if the fingerprint of a DataFrame, or other data, changes
+    when it is changed in place, and not only when it is rebound.
+    """
+    return type(df) in fingerprint_support_map or isinstance(df, (list, tuple))
+
+
+def default_fingerprint(obj, samples=16):
+    if not isinstance(obj, (list, tuple)):
+        return (type(obj), id(obj))
+
+    size = len(obj)
+    sampled = obj
+    if size > samples:
+        sampled = [obj[int(i * (size - 1) / (samples - 1))] for i in range(samples)]
+    digest = hashlib.sha1(repr(sampled).encode('utf-8')).hexdigest()
+    return (type(obj), id(obj), size, digest)
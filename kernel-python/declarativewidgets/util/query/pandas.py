@@ -1,5 +1,11 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
+from __future__ import absolute_import
+
+import hashlib
+
+import numpy
+import pandas
 
 
 def apply_query(df, query=[]):
@@ -52,6 +58,16 @@ def handle_group(df, grp_expr):
     return df
 
 
+def apply_offset(df, offset):
+    """
+    Skips the first rows of a DataFrame
+    :param df: a Pandas DataFrame
+    :param offset: number of rows to skip
+    :return: DataFrame without the first `offset` rows
+    """
+    return df.iloc[offset:]
+
+
 def handle_sort(df, sort_expr):
     """
     Handles a sort expression
@@ -96,3 +112,52 @@ def to_dict_agg(agg_array):
 
 def to_single_column_names(column_array):
     return map(lambda col: col[1:] if col.startswith('_') else col, ['_'.join(col[::-1]).strip() for col in column_array])
+
+
+
+def fingerprint(df, samples=16):
+    """
+    Computes a fingerprint of a DataFrame that changes when it changes, in
+    time proportional to its number of columns.
+
+    Combines the identity, shape, columns, dtypes and index of the DataFrame
+    with the addresses of its underlying blocks, which change when columns are
+    assigned or the frame is copied. Values written in place keep the block
+    addresses, so a hash of up to `samples` evenly spaced rows, including the
+    first and last, is added to catch some of those changes.
+    :param df: a Pandas DataFrame
+    :param samples: number of rows to hash
+    :return: a hashable fingerprint
+    """
+    try:
+        blocks = df._mgr.blocks
+    except AttributeError:
+        # pandas < 1.0
+        blocks = df._data.blocks
+
+    buffers = tuple(
+        b.values.__array_interface__['data'][0] if isinstance(b.values, numpy.ndarray) else id(b.values)
+        for b in blocks)
+
+    return (id(df), df.shape, tuple(df.columns), tuple(str(t) for t in df.dtypes),
+            id(df.index), buffers, sampled_hash(df, samples))
+
+
+def sampled_hash(df, samples=16):
+    """
+    Hashes up to `samples` evenly spaced rows of a DataFrame.
+    :param df: a Pandas DataFrame
+    :param samples: number of rows to hash
+    :return: a hex digest
+    """
+    rows = len(df)
+    if rows > samples:
+        positions = sorted(set(int(i * (rows - 1) / (samples - 1)) for i in range(samples)))
+        df = df.iloc[positions]
+
+    try:
+        hashed = pandas.util.hash_pandas_object(df, index=True).values.tobytes()
+    except TypeError:
+        # unhashable values, e.g. lists
+        hashed = repr(df.values.tolist()).encode('utf-8')
+    return hashlib.sha1(hashed).hexdigest()
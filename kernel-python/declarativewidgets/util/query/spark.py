@@ -61,9 +61,38 @@ def handle_sort(df, sort_expr):
     return df.orderBy(sort_cols, ascending=sort_dir)
 
 
+def apply_offset(df, offset):
+    """
+    Skips the first rows of a DataFrame, in the order of its last sort
+    :param df: a Pyspark DataFrame
+    :param offset: number of rows to skip
+    :return: DataFrame without the first `offset` rows
+    """
+    if not offset:
+        return df
+    if hasattr(df, 'offset'):
+        # Spark 3.4 and later
+        return df.offset(offset)
+
+    rows = df.rdd.zipWithIndex().filter(lambda row: row[1] >= offset).keys()
+    return df.sql_ctx.createDataFrame(rows, df.schema)
+
+
 def to_array_of_func_exprs(agg_array):
     return map(F.expr, to_array_of_func_exprs_string(agg_array))
 
 
 def to_array_of_func_exprs_string(agg_array):
     return ["{0}({1})".format(x["op"], x["col"]) for x in agg_array]
+
+
+
+def fingerprint(df):
+    """
+    Computes a fingerprint of a Spark DataFrame from its identity and its
+    logical plan, without computing it. Spark DataFrames are immutable, but
+    the plan does not reflect changes to the data of the sources it reads.
+    :param df: a Pyspark DataFrame
+    :return: a hashable fingerprint
+    """
+    return (id(df), df._jdf.queryExecution().logical().toString())
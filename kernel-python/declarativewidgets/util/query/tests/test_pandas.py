@@ -45,3 +45,63 @@ class TestFunctions(unittest.TestCase):
         actual = to_single_column_names(arg_array)
 
         self.assertEqual(expected, list(actual))
+
+    def test_fingerprint(self):
+        """should change the fingerprint when the DataFrame changes"""
+        import pandas as pd
+        df = pd.DataFrame({'a': list(range(100)), 'b': ['x'] * 100})
+        before = fingerprint(df)
+        self.assertEqual(fingerprint(df), before)
+
+        df['c'] = 1
+        self.assertNotEqual(fingerprint(df), before)
+
+        before = fingerprint(df)
+        df['a'] = df['a'] * 2
+        self.assertNotEqual(fingerprint(df), before)
+
+        before = fingerprint(df)
+        df.iloc[0, 0] = -1
+        self.assertNotEqual(fingerprint(df), before)
+
+    def test_sampled_hash_unhashable(self):
+        """should hash DataFrames holding unhashable values"""
+        import pandas as pd
+        df = pd.DataFrame({'a': [[1], [2]]})
+        self.assertEqual(sampled_hash(df), sampled_hash(df.copy()))
+
+    def test_fingerprint_registry(self):
+        """should dispatch to the registered fingerprint and fall back for other types"""
+        import pandas as pd
+        from .. import fingerprint as any_fingerprint
+        df = pd.DataFrame({'a': [1, 2]})
+        self.assertEqual(any_fingerprint(df), fingerprint(df))
+
+        data = list(range(100))
+        before = any_fingerprint(data)
+        data[0] = -1
+        self.assertNotEqual(any_fingerprint(data), before)
+
+    def test_apply_offset(self):
+        """should skip the first rows of the DataFrame and of sequences"""
+        import pandas as pd
+        from .. import apply_offset as any_apply_offset
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        self.assertEqual(list(apply_offset(df, 1)['a']), [2, 3])
+        self.assertEqual(list(any_apply_offset(df, 2)['a']), [3])
+        self.assertIs(any_apply_offset(df, 0), df)
+        self.assertEqual(any_apply_offset([1, 2, 3], 1), [2, 3])
+
+    def test_reverse_sort(self):
+        """should reverse the order of the last sort of a query"""
+        from .. import reverse_sort
+        query = [
+            {"type": "sort", "expr": {"by": "a", "ascending": True}},
+            {"type": "filter", "expr": "a > 1"},
+            {"type": "sort", "expr": {"by": ["a", "b"], "ascending": [True, False]}}
+        ]
+        reversed_query = reverse_sort(query)
+        self.assertEqual(reversed_query[0], query[0])
+        self.assertEqual(reversed_query[2]['expr'], {"by": ["a", "b"], "ascending": [False, True]})
+        self.assertEqual(query[2]['expr']['ascending'], [True, False])
+        self.assertIsNone(reverse_sort([{"type": "filter", "expr": "a > 1"}]))
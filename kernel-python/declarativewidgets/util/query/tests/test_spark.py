@@ -4,6 +4,11 @@
 
 import unittest
 
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
 from ..spark import *
 
 
@@ -28,3 +33,13 @@ class TestFunctions(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_apply_offset_without_dataframe_offset(self):
+        """should skip rows by index when DataFrame.offset is not available"""
+        df = Mock(spec=['rdd', 'sql_ctx', 'schema'])
+        df.rdd.zipWithIndex.return_value.filter.return_value.keys.return_value = 'rows'
+
+        self.assertIs(apply_offset(df, 0), df)
+        apply_offset(df, 2)
+        keep = df.rdd.zipWithIndex.return_value.filter.call_args[0][0]
+        self.assertEqual([keep(('row', i)) for i in range(4)], [False, False, True, True])
+        df.sql_ctx.createDataFrame.assert_called_once_with('rows', df.schema)
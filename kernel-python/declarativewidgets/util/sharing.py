@@ -0,0 +1,73 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Sharing of results computed for identical requests.
+
+Dashboards often bind several elements to the same data, e.g. a table and a
+chart of the same DataFrame with the same query, which sync one after the
+other, e.g. when the notebook is loaded. `SharedResults` keeps the result
+computed for the first of them, keyed by a fingerprint of the data and the
+parameters of the request, so the others get it without computing it again.
+Results are discarded after each execution, and after functions are invoked
+from the front-end, when the data may have changed in ways fingerprints miss.
+"""
+
+from .cache import LRUCache
+
+# Maximum number of results kept between executions.
+max_results = 32
+
+_missing = object()
+
+_shared = None
+
+
+def shared_results(shell):
+    """Returns the results shared by the widgets of a shell.
+
+    Parameters
+    ----------
+    shell : InteractiveShell
+        The shell whose executions discard the results.
+
+    Returns
+    -------
+    SharedResults
+    """
+    global _shared
+    if _shared is None or _shared.shell is not shell:
+        _shared = SharedResults(shell)
+    return _shared
+
+
+class SharedResults(object):
+    """ Results computed once for identical requests until the next
+    execution.
+
+    Examples
+    --------
+    >>> shared = SharedResults(get_ipython())
+    >>> shared.get_or_compute((fingerprint(df), query, limit), compute)
+    """
+
+    def __init__(self, shell):
+        self.shell = shell
+        self._cache = LRUCache(max_results)
+        shell.events.register('post_execute', self.invalidate)
+
+    def get_or_compute(self, key, compute):
+        """Returns the result shared for a key, calling `compute` to get it
+        if there is none. Results are not shared for unhashable keys.
+        """
+        try:
+            result = self._cache.get(key, _missing)
+        except TypeError:
+            return compute()
+
+        if result is _missing:
+            result = self._cache[key] = compute()
+        return result
+
+    def invalidate(self, *args):
+        """Discards all shared results."""
+        self._cache.clear()
@@ -0,0 +1,67 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the adaptive.py module
+
+"""
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+from ..adaptive import *
+
+
+class TestAdaptiveLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.adaptive = AdaptiveLimit()
+
+    def test_default(self):
+        """should use the default limit until rows are measured"""
+        self.assertEqual(self.adaptive.limit(100, latency_budget=50), 100)
+        self.adaptive.measure(0, 1.0)
+        self.assertEqual(self.adaptive.limit(100, latency_budget=50), 100)
+
+    def test_latency_budget(self):
+        """should fit the rows in the latency budget"""
+        self.adaptive.measure(100, 0.1)
+        self.assertEqual(self.adaptive.limit(100, latency_budget=50), 50)
+        self.assertEqual(self.adaptive.limit(100), 100)
+
+    def test_byte_budget(self):
+        """should fit the encoded rows in the byte budget"""
+        payload = {'data': [[1, 2, 3]] * 10}
+        self.adaptive.measure(10, 0, payload)
+        self.assertTrue(self.adaptive.bytes_per_row > 0)
+        limit = self.adaptive.limit(100, byte_budget=1000)
+        self.assertEqual(limit, int(1000 / self.adaptive.bytes_per_row))
+
+    def test_smallest_limit(self):
+        """should fit the rows in both budgets and within bounds"""
+        self.adaptive.seconds_per_row = 0.001
+        self.adaptive.bytes_per_row = 100.0
+        self.assertEqual(self.adaptive.limit(10, latency_budget=100, byte_budget=5000), 50)
+        self.assertEqual(self.adaptive.limit(10, byte_budget=1), min_limit)
+        self.adaptive.seconds_per_row = 1e-9
+        self.assertEqual(self.adaptive.limit(10, latency_budget=1000), max_limit)
+
+    def test_smoothing(self):
+        """should weigh the latest measurement with the previous estimate"""
+        self.adaptive.measure(10, 1.0)
+        self.adaptive.measure(10, 3.0)
+        self.assertAlmostEqual(self.adaptive.seconds_per_row, 0.2)
+
+    def test_widget_limit(self):
+        """should use the limit of a widget unless it has a budget set"""
+        widget = Mock(limit=10, latency_budget=0, byte_budget=0)
+        self.adaptive.measure(100, 0.1)
+        self.assertFalse(self.adaptive.enabled(widget))
+        self.assertEqual(self.adaptive.widget_limit(widget), 10)
+
+        widget.latency_budget = 50
+        self.assertTrue(self.adaptive.enabled(widget))
+        self.assertEqual(self.adaptive.widget_limit(widget), 50)
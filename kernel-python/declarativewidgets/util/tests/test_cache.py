@@ -0,0 +1,41 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the cache.py module
+
+"""
+
+import unittest
+
+from ..cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get(self):
+        """should return stored values and the default for missing keys"""
+        cache = LRUCache(maxsize=2)
+        cache['a'] = 1
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', 2), 2)
+
+    def test_evict_least_recently_used(self):
+        """should evict the least recently used entry when full"""
+        cache = LRUCache(maxsize=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+        cache['c'] = 3
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        """should expire entries after the ttl"""
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache['a'] = 1
+        self.assertEqual(cache.get('a'), 1)
+        cache._expires['a'] = 0
+        self.assertFalse('a' in cache)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(len(cache), 0)
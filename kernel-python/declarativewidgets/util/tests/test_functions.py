@@ -226,4 +226,104 @@ class TestFunctions(unittest.TestCase):
         args = {'a': '1', 'b': '2.0', 'c': '{1, 2, 3}'}
 
         with self.assertRaises(ValueError):
-            apply_with_conversion(func, args)
\ No newline at end of file
+            apply_with_conversion(func, args)
+
+    def test_memoize(self):
+        """should return cached results for the same arguments"""
+        calls = []
+
+        @memoize(maxsize=2)
+        def func(a, b=1):
+            calls.append(a)
+            return a + b
+
+        self.assertEqual(func(a=1), 2)
+        self.assertEqual(func(a=1), 2)
+        self.assertEqual(func(a=2), 3)
+        self.assertEqual(calls, [1, 2])
+
+        func.cache_clear()
+        self.assertEqual(func(a=1), 2)
+        self.assertEqual(calls, [1, 2, 1])
+
+    def test_memoize_signature(self):
+        """should keep the signature of the memoized function"""
+        @memoize()
+        def func(a, b=1.0):
+            return a
+
+        self.assertEqual(parameter_types(func)['b'], float)
+        self.assertEqual(apply_with_conversion(func, {'a': 'x'}), 'x')
+
+    #### function_spec
+    def test_function_spec_cached(self):
+        """should inspect a function only once"""
+        def func(a, b=1.0):
+            return a
+
+        spec = function_spec(func)
+        self.assertIs(function_spec(func), spec)
+        self.assertEqual(spec.convert({'a': 'x', 'b': '2', 'c': 3}), {'a': 'x', 'b': 2.0})
+
+    def test_function_spec_rebound(self):
+        """should compute a new spec for a new or redefined function"""
+        def func(a, b=1.0):
+            return a
+        spec = function_spec(func)
+
+        def func(a, b=[1]):
+            return a
+        self.assertEqual(function_spec(func).types['b'], list)
+
+        func.__defaults__ = (1.0,)
+        self.assertEqual(function_spec(func).types['b'], float)
+
+    def test_function_spec_method(self):
+        """should share the spec among bound methods of a function"""
+        class Test(object):
+            def method(self, a, b=1):
+                return a
+
+        spec = function_spec(Test().method)
+        self.assertIs(function_spec(Test().method), spec)
+        self.assertEqual(sorted(spec.types.keys()), ['a', 'b'])
+
+    def test_function_spec_signature_copy(self):
+        """should not let callers modify the cached signature"""
+        def func(a, b=1.0):
+            return a
+
+        signature_spec(func)['b']['value'] = 2.0
+        self.assertEqual(signature_spec(func)['b']['value'], 1.0)
+
+    #### apply_batch
+    def test_apply_batch(self):
+        """should call an unbatched function once per call"""
+        def func(a, b=1):
+            return a + b
+
+        self.assertEqual(apply_batch(func, [{'a': 1}, {'a': 2, 'b': 3}]), [2, 5])
+
+    def test_apply_batch_batched(self):
+        """should call a batched function once with lists of values"""
+        calls = []
+
+        @batched
+        def func(a, b=1):
+            calls.append((a, b))
+            return [x + y for x, y in zip(a, b)]
+
+        self.assertEqual(apply_batch(func, [{'a': 1}, {'a': 2, 'b': 3}]), [2, 5])
+        self.assertEqual(calls, [([1, 2], [1, 3])])
+        self.assertEqual(apply_converted(func, {'a': 4}), 5)
+
+    def test_apply_batch_batched_errors(self):
+        """should fail on missing arguments or a wrong number of results"""
+        @batched
+        def func(a):
+            return a[:1]
+
+        with self.assertRaises(TypeError):
+            apply_batch(func, [{'a': 1}, {}])
+        with self.assertRaises(ValueError):
+            apply_batch(func, [{'a': 1}, {'a': 2}])
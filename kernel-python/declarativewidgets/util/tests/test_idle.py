@@ -0,0 +1,72 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the idle.py module
+
+"""
+
+import time
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+from ..idle import *
+
+
+class TestIdleScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = Mock()
+        self.scheduler = IdleScheduler(self.loop)
+
+    def run_timer(self):
+        callback = self.loop.call_later.call_args[0][1]
+        self.loop.call_later.reset_mock()
+        callback()
+
+    def test_schedule(self):
+        """should run the tasks one at a time, in order, after a delay"""
+        calls = []
+        self.scheduler.schedule('a', lambda: calls.append('a'))
+        self.scheduler.schedule('b', lambda: calls.append('b'))
+        self.loop.call_later.assert_called_once_with(idle_delay, self.scheduler._run)
+
+        self.run_timer()
+        self.assertEqual(calls, ['a'])
+        self.run_timer()
+        self.assertEqual(calls, ['a', 'b'])
+        self.assertFalse(self.loop.call_later.called)
+
+    def test_replace(self):
+        """should replace the task scheduled with the same key"""
+        calls = []
+        self.scheduler.schedule('a', lambda: calls.append(1))
+        self.scheduler.schedule('a', lambda: calls.append(2))
+        self.assertEqual(self.scheduler.pending(), 1)
+        self.run_timer()
+        self.assertEqual(calls, [2])
+
+    def test_request_postpones(self):
+        """should postpone the tasks after a request"""
+        task = Mock()
+        self.scheduler.schedule('a', task)
+        self.scheduler.request()
+        self.run_timer()
+        self.assertFalse(task.called)
+        self.assertTrue(self.loop.call_later.called)
+
+        self.scheduler._last_request = time.time() - idle_delay
+        self.run_timer()
+        self.assertTrue(task.called)
+
+    def test_failing_task(self):
+        """should keep running tasks after one fails"""
+        task = Mock()
+        self.scheduler.schedule('a', Mock(side_effect=ValueError()))
+        self.scheduler.schedule('b', task)
+        self.run_timer()
+        self.run_timer()
+        self.assertTrue(task.called)
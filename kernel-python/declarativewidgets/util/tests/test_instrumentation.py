@@ -0,0 +1,98 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the instrumentation.py module
+
+"""
+
+import unittest
+
+from .. import instrumentation
+from ..instrumentation import *
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        enable_stats()
+        reset_stats()
+
+    def tearDown(self):
+        disable_stats()
+        reset_stats()
+
+    def test_stats(self):
+        """should aggregate finished traces per target and phase"""
+        for i in range(3):
+            trace = Trace('DataFrame', 'df', 'id1')
+            trace.add_phase('serialize', 0.003)
+            trace.payload({'data': [1, 2, 3]})
+            trace.finish()
+
+        widget = stats()['widgets']['id1']
+        self.assertEqual(widget['type'], 'DataFrame')
+        self.assertEqual(widget['name'], 'df')
+        self.assertEqual(widget['count'], 3)
+        self.assertEqual(widget['phases']['serialize']['count'], 3)
+        self.assertEqual(widget['phases']['serialize']['buckets']['<=5'], 3)
+        self.assertEqual(widget['bytes']['max'], len('{"data": [1, 2, 3]}'))
+
+    def test_stats_channels(self):
+        """should report channel variables separately from widgets"""
+        trace = Trace('Channel', 'c:x')
+        with trace.phase('send'):
+            pass
+        trace.finish()
+
+        self.assertEqual(list(stats()['channels'].keys()), ['c:x'])
+        self.assertEqual(stats()['widgets'], {})
+
+    def test_disabled(self):
+        """should not aggregate traces when disabled"""
+        disable_stats()
+        trace = Trace('DataFrame', 'df', 'id1')
+        trace.payload([1])
+        trace.finish()
+
+        self.assertEqual(trace.bytes, None)
+        self.assertEqual(stats(), {'widgets': {}, 'channels': {}})
+
+    def test_status(self):
+        """should only include stats in the status when requested"""
+        trace = Trace('Function', 'f', 'id1')
+        trace.finish()
+        self.assertEqual(trace.status(), {})
+
+        enable_stats(include_status=True)
+        self.assertEqual(trace.status()['stats']['count'], 1)
+
+    def test_histogram(self):
+        """should count values in the first bucket whose bound they do not exceed"""
+        histogram = Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.add(value)
+
+        self.assertEqual(histogram.as_dict()['buckets'], {'<=1': 2, '<=10': 1, '>10': 1})
+        self.assertEqual(histogram.as_dict()['max'], 50)
+
+    def test_timing(self):
+        """should include the timing breakdown in the status of a detailed trace"""
+        disable_stats()
+        trace = Trace('DataFrame', 'df', 'id1', detailed=True)
+        trace.add_phase('query', 0.0125)
+        trace.rows(rows_in=10, rows_out=2)
+        trace.payload([1, 2])
+        trace.finish()
+
+        self.assertEqual(trace.status(), {'timing': {
+            'query': 12.5, 'rows_in': 10, 'rows_out': 2, 'bytes': 6
+        }})
+
+    def test_row_count(self):
+        """should count rows of sequences and shaped objects only"""
+        import pandas
+        self.assertEqual(row_count(pandas.DataFrame({'a': [1, 2, 3]})), 3)
+        self.assertEqual(row_count([1, 2]), 2)
+        self.assertEqual(row_count('abc'), None)
+        self.assertEqual(serialized_row_count({'data': [[1], [2]]}), 2)
+        self.assertEqual(serialized_row_count('abc'), None)
@@ -0,0 +1,79 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the names.py module
+
+"""
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+from ..names import *
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
+
+
+class Obj(object):
+    pass
+
+
+class TestNameResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = NameResolver(ip)
+        self.obj = Obj()
+        self.obj.child = Obj()
+        self.obj.child.value = 1
+        ip.user_ns['resolver_obj'] = self.obj
+
+    def tearDown(self):
+        ip.events.unregister('post_execute', self.resolver.invalidate)
+
+    def test_resolve(self):
+        """should resolve dotted names in the user namespace"""
+        self.assertIs(self.resolver.resolve('resolver_obj'), self.obj)
+        self.assertEqual(self.resolver.resolve('resolver_obj.child.value'), 1)
+        with self.assertRaises(KeyError):
+            self.resolver.resolve('resolver_missing')
+        with self.assertRaises(AttributeError):
+            self.resolver.resolve('resolver_obj.missing')
+
+    def test_cache(self):
+        """should return cached objects until the namespace is executed"""
+        self.assertEqual(self.resolver.resolve('resolver_obj.child.value'), 1)
+        self.obj.child.value = 2
+        self.assertEqual(self.resolver.resolve('resolver_obj.child.value'), 1)
+
+        ip.events.trigger('post_execute')
+        self.assertEqual(self.resolver.resolve('resolver_obj.child.value'), 2)
+
+    def test_root_rebound(self):
+        """should resolve again when the root name is rebound"""
+        self.assertEqual(self.resolver.resolve('resolver_obj.child.value'), 1)
+        other = Obj()
+        other.child = Obj()
+        other.child.value = 3
+        ip.user_ns['resolver_obj'] = other
+        self.assertEqual(self.resolver.resolve('resolver_obj.child.value'), 3)
+
+    def test_invalidated_by_widgets(self):
+        """should resolve again after user code invoked by a widget ran"""
+        from ipykernel.comm import Comm
+        from ...urth_widget import UrthWidget
+        widget = UrthWidget(comm=Mock(spec=Comm))
+        resolver = name_resolver(ip)
+        self.assertEqual(resolver.resolve('resolver_obj.child.value'), 1)
+        self.obj.child = Obj()
+        self.obj.child.value = 4
+        widget._invalidate_caches()
+        self.assertEqual(resolver.resolve('resolver_obj.child.value'), 4)
+
+    def test_name_resolver_shared(self):
+        """should share a resolver per shell"""
+        self.assertIs(name_resolver(ip), name_resolver(ip))
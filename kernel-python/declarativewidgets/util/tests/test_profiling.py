@@ -0,0 +1,61 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the profiling.py module
+
+"""
+
+import unittest
+
+from .. import profiling
+from ..profiling import *
+
+
+def work():
+    return sum(range(100))
+
+
+class TestProfiling(unittest.TestCase):
+
+    def tearDown(self):
+        del profiling._requests[:]
+
+    def test_profile_by_name(self):
+        """should profile the next n executions for a name"""
+        p = profile('df', n_calls=2)
+        self.assertIsNone(p.stats())
+        for i in range(3):
+            with profiled(object(), 'df'):
+                work()
+
+        self.assertEqual(p.calls, 2)
+        self.assertTrue(p.done)
+        self.assertEqual(profiling._requests, [])
+        self.assertIn('work', [f[2] for f in p.stats().stats])
+
+    def test_profile_by_widget(self):
+        """should only profile executions of the given widget"""
+        widget = object()
+        p = profile(widget)
+        with profiled(object(), 'df'):
+            work()
+        self.assertEqual(p.calls, 0)
+        with profiled(widget, 'df'):
+            work()
+        self.assertEqual(p.calls, 1)
+
+    def test_wrap(self):
+        """should profile a wrapped function when called"""
+        p = profile('default:x')
+        wrapped = wrap(work, object(), 'default:x')
+        self.assertEqual(p.calls, 0)
+        self.assertEqual(wrapped(), work())
+        self.assertEqual(p.calls, 1)
+
+    def test_cancel(self):
+        """should stop profiling once cancelled"""
+        p = profile('df')
+        p.cancel()
+        with profiled(object(), 'df'):
+            work()
+        self.assertEqual(p.calls, 0)
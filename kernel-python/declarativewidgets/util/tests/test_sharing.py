@@ -0,0 +1,52 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+""" Tests for the sharing.py module
+
+"""
+
+import unittest
+
+try:
+    from unittest.mock import Mock
+except ImportError as e:
+    from mock import Mock
+
+from ..sharing import *
+
+# Execute tests within an IPython instance
+from IPython.testing.globalipapp import get_ipython
+ip = get_ipython()
+
+
+class TestSharedResults(unittest.TestCase):
+
+    def setUp(self):
+        self.shared = SharedResults(ip)
+
+    def tearDown(self):
+        ip.events.unregister('post_execute', self.shared.invalidate)
+
+    def test_get_or_compute(self):
+        """should compute the result once for the same key"""
+        compute = Mock(return_value=1)
+        self.assertEqual(self.shared.get_or_compute(('df', '[]', 100), compute), 1)
+        self.assertEqual(self.shared.get_or_compute(('df', '[]', 100), compute), 1)
+        self.assertEqual(compute.call_count, 1)
+        self.shared.get_or_compute(('df', '[]', 10), compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_unhashable_key(self):
+        """should compute the result each time for an unhashable key"""
+        compute = Mock(return_value=1)
+        self.shared.get_or_compute((['df'], '[]', 100), compute)
+        self.shared.get_or_compute((['df'], '[]', 100), compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_invalidate_after_execute(self):
+        """should discard the results after an execution"""
+        compute = Mock(return_value=1)
+        self.shared.get_or_compute('key', compute)
+        ip.events.trigger('post_execute')
+        self.shared.get_or_compute('key', compute)
+        self.assertEqual(compute.call_count, 2)
@@ -1,9 +1,19 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
 
-from collections import defaultdict
+import time
+import json
+import hashlib
+import threading
+from collections import defaultdict, deque
+
+from tornado.ioloop import IOLoop
 
 from .urth_widget import UrthWidget
+from .util.cache import LRUCache
+from .util.concurrency import thread_pool, is_coroutine_function, to_future
+from .util.instrumentation import Trace
+from .util.profiling import profiled, wrap as profiled_call
 
 # Global variable used to store the current Channels instance
 the_channels = None
@@ -11,13 +21,26 @@ the_channels = None
 # maps channel name to a map of variable name to map of value and arguments
 channel_data = defaultdict(dict)
 
-# maps channel name to a map of variable name to handler function
+# maps channel name to a map of variable name to Watcher
 channel_watchers = defaultdict(dict)
 
 
 class Channels(UrthWidget):
     """ A widget that provides an API for setting bound channel variables. """
 
+    # Default maximum number of updates per second sent to the front-end for
+    # a single channel variable. None disables throttling. Can be changed
+    # globally (e.g. `Channels.max_rate = 10`) or per call to `set`.
+    max_rate = None
+
+    # Maximum number of channel variables for which a digest of the last
+    # value sent is kept to skip sending unchanged values.
+    digest_cache_size = 1024
+
+    # Maximum number of channel variables whose latest value is mirrored in
+    # the kernel and available through `get`.
+    mirror_size = 1024
+
     def __init__(self, value=None, **kwargs):
         self.log.info("Created a new Channels widget.")
         self.serializer = None
@@ -29,6 +52,36 @@ class Channels(UrthWidget):
         # Watchers may have been requested prior to the Channels model creation.
         self.watch_handlers = channel_watchers
 
+        # Throttled updates are flushed by timers on the kernel's event loop.
+        # Updates made from other threads, e.g. by threaded watch handlers,
+        # are handed over to the thread running it.
+        self._loop = IOLoop.current()
+        self._loop_thread = threading.current_thread()
+
+        # maps "chan:key" to the time the last update was sent
+        self._last_sent = {}
+
+        # maps "chan:key" to the latest (key, value, chan, force, kwargs) held
+        # back by throttling
+        self._pending = {}
+
+        # maps "chan:key" to the (key, chan, maxlen, items) appended but held
+        # back by throttling
+        self._pending_appends = {}
+
+        # "chan:key" for which a timer to flush held back updates is scheduled
+        self._flush_scheduled = set()
+
+        # maps "chan:key" to the ring buffer of values of an appended variable
+        self._history = {}
+
+        # maps "chan:key" to a digest of the value last known by the front-end
+        self._digests = LRUCache(self.digest_cache_size)
+
+        # maps "chan:key" to the latest value set in the kernel or received
+        # from the front-end
+        self._values = LRUCache(self.mirror_size)
+
         super(Channels, self).__init__(**kwargs)
 
     def get_state(self, key=None):
@@ -42,18 +95,240 @@ class Channels(UrthWidget):
         state = {}
         for channel, data in channel_data.items():
             for key, params in data.items():
-                a_key, a_value = self._prep_to_send(key, params['value'], channel, **params['args'])
+                args = dict(params['args'])
+                args.pop('max_rate', None)
+                args.pop('force', None)
+                value = params['value']
+                if isinstance(value, deque):
+                    # A ring buffer filled by append
+                    a_key = "{}:{}".format(channel, key)
+                    a_value = [self._prep_to_send(key, item, channel)[1] for item in value]
+                    self._history[a_key] = value
+                else:
+                    a_key, a_value = self._prep_to_send(key, value, channel, **args)
                 state[a_key] = a_value
+                self._digests[a_key] = _digest(a_value)
+                self._values[a_key] = value
 
         channel_data.clear()
         return state
 
-    def set(self, key, value, chan='default', **kwargs):
-        attr, serialized = self._prep_to_send(key, value, chan, **kwargs)
-        self._send_update(attr, serialized)
+    def set(self, key, value, chan='default', max_rate=None, force=False, **kwargs):
+        """
+        Sets the value of a channel variable on the front-end.
+
+        Parameters
+        ----------
+        key : string
+            The channel variable name.
+        value : object
+            The value to set. Serialized before being sent.
+        chan : string
+            The channel name.
+        max_rate : number
+            Maximum number of updates per second for this variable, overriding
+            `Channels.max_rate`. Values set faster than this are not sent;
+            only the latest one is, once the throttle period elapses.
+        force : boolean
+            Send the value even if it is the same as the one last sent.
+
+        When called from another thread than the kernel's, e.g. by a threaded
+        watch handler, the value is set later on the kernel's thread.
+        """
+        if not self._on_loop_thread():
+            self._loop.add_callback(
+                self.set, key, value, chan, max_rate, force, **kwargs)
+            return
+
+        rate = max_rate if max_rate is not None else self.max_rate
+        attr = "{}:{}".format(chan, key)
+        self._values[attr] = value
+
+        # The value replaces any history built by append.
+        self._history.pop(attr, None)
+        self._pending_appends.pop(attr, None)
+
+        if not rate:
+            # A direct update supersedes any value held back by throttling.
+            self._pending.pop(attr, None)
+            self._send_value(key, value, chan, force, **kwargs)
+            return
+
+        wait = self._throttle_wait(attr, rate)
+        if wait <= 0:
+            # The throttle period elapsed, e.g. in a loop blocking the event
+            # loop and its flush timer, so the latest value goes out now.
+            self._pending.pop(attr, None)
+            self._send_value(key, value, chan, force, **kwargs)
+        else:
+            self._schedule_flush(attr, wait)
+            self._pending[attr] = (key, value, chan, force, kwargs)
+
+    def append(self, key, value, chan='default', maxlen=10000, max_rate=None):
+        """
+        Appends a value to a channel variable holding a list, keeping at most
+        the last `maxlen` values. Only the appended value is sent to the
+        front-end rather than the whole list.
+
+        Parameters
+        ----------
+        key : string
+            The channel variable name.
+        value : object
+            The value to append. Serialized before being sent.
+        chan : string
+            The channel name.
+        maxlen : int
+            Maximum number of values kept, oldest values being dropped first.
+        max_rate : number
+            Maximum number of updates per second for this variable, overriding
+            `Channels.max_rate`. Values appended faster than this are sent
+            together once the throttle period elapses.
+
+        When called from another thread than the kernel's, the value is
+        appended later on the kernel's thread.
+        """
+        if not self._on_loop_thread():
+            self._loop.add_callback(self.append, key, value, chan, maxlen, max_rate)
+            return
+
+        rate = max_rate if max_rate is not None else self.max_rate
+        attr = "{}:{}".format(chan, key)
+
+        history = self._history.get(attr)
+        if history is None:
+            # Continue from a list set before, as the front-end appends to it.
+            current = self._values.get(attr)
+            history = current if isinstance(current, (list, tuple)) else ()
+        if not isinstance(history, deque) or history.maxlen != maxlen:
+            history = deque(history, maxlen)
+            self._history[attr] = history
+        history.append(value)
+        self._values[attr] = history
+
+        # The front-end value changes without the digest being recomputed.
+        self._digests.pop(attr)
+
+        pending = self._pending_appends.get(attr)
+        if pending is None:
+            pending = self._pending_appends[attr] = (key, chan, maxlen, [])
+        pending[3].append(value)
+
+        wait = self._throttle_wait(attr, rate) if rate else 0
+        if wait <= 0:
+            self._flush(attr)
+        else:
+            self._schedule_flush(attr, wait)
+
+    def get(self, key, chan='default', default=None):
+        """
+        Returns the latest value of a channel variable known by the kernel,
+        either set in the kernel or changed on the front-end. Returns
+        `default` if the variable has no known value.
+        """
+        value = self._values.get("{}:{}".format(chan, key), default)
+        return list(value) if isinstance(value, deque) else value
+
+    def watch(self, key, handler, chan='default', threaded=False, drop_stale=True,
+              debounce_ms=None, throttle_ms=None):
+        """
+        Registers a handler invoked with the old and new values when a channel
+        variable changes on the front-end.
+
+        Parameters
+        ----------
+        key : string
+            The channel variable name.
+        handler : function
+            Called as `handler(old, new)`. An `async def` handler is run as a
+            coroutine on the kernel's event loop.
+        chan : string
+            The channel name.
+        threaded : boolean
+            Run the handler in a thread pool instead of the kernel's message
+            loop.
+        drop_stale : boolean
+            For coroutine and threaded handlers, which never run concurrently
+            for the same variable, only deliver the latest change that arrived
+            while the handler was running instead of every change.
+        debounce_ms : number
+            Wait until no change has arrived for this many milliseconds before
+            calling the handler once for the whole burst of changes.
+        throttle_ms : number
+            Call the handler at most once every this many milliseconds. When
+            combined with `debounce_ms`, the maximum time a burst of changes
+            is held back.
+
+        When changes are coalesced by `debounce_ms` or `throttle_ms`, the
+        handler receives the old value of the first change and the new value
+        of the last one.
+        """
+        self.watch_handlers[chan][key] = Watcher(
+            handler, threaded, drop_stale, debounce_ms, throttle_ms)
 
-    def watch(self, key, handler, chan='default'):
-        self.watch_handlers[chan][key] = handler
+    def _on_loop_thread(self):
+        return threading.current_thread() is self._loop_thread
+
+    def _throttle_wait(self, attr, rate):
+        """
+        Returns the number of seconds before an update for `attr` can be sent
+        without exceeding `rate` updates per second.
+        """
+        return self._last_sent.get(attr, 0) + 1.0 / rate - time.time()
+
+    def _schedule_flush(self, attr, wait):
+        if attr not in self._flush_scheduled:
+            self._flush_scheduled.add(attr)
+            self._loop.call_later(max(wait, 0), self._flush, attr)
+
+    def _flush(self, attr):
+        """
+        Sends the latest value and the appended values held back by
+        throttling for `attr`, if any.
+        """
+        self._flush_scheduled.discard(attr)
+
+        if attr in self._pending:
+            key, value, chan, force, kwargs = self._pending.pop(attr)
+            self._send_value(key, value, chan, force, **kwargs)
+
+        if attr in self._pending_appends:
+            key, chan, maxlen, items = self._pending_appends.pop(attr)
+            self._send_appended(key, chan, maxlen, items)
+
+    def _send_value(self, key, value, chan='default', force=False, **kwargs):
+        trace = Trace("Channel", "{}:{}".format(chan, key))
+        with trace.phase("serialize"):
+            attr, serialized = self._prep_to_send(key, value, chan, **kwargs)
+
+        # Skip values the front-end already has, e.g. when a cell is re-run.
+        digest = _digest(serialized)
+        if not force and self._digests.get(attr) == digest:
+            return
+
+        with trace.phase("send"):
+            self._send_update(attr, serialized)
+        trace.payload(serialized)
+        trace.finish()
+        self._digests[attr] = digest
+        self._last_sent[attr] = time.time()
+
+    def _send_appended(self, key, chan, maxlen, items):
+        attr = "{}:{}".format(chan, key)
+        trace = Trace("Channel", attr)
+        with trace.phase("serialize"):
+            serialized = [self._prep_to_send(key, item, chan)[1] for item in items[-maxlen:]]
+        with trace.phase("send"):
+            self.send({
+                "event": "append",
+                "channel": chan,
+                "name": key,
+                "items": serialized,
+                "maxlen": maxlen
+            })
+        trace.payload(serialized)
+        trace.finish()
+        self._last_sent[attr] = time.time()
 
     def _prep_to_send(self, key, value, chan='default', **kwargs):
 
@@ -71,19 +346,192 @@ class Channels(UrthWidget):
     def _handle_change_msg(self, wid, content, buffers):
         if content.get('event', '') == 'change':
             data = content.get('data', {})
+            if 'channel' in data and 'name' in data:
+                # Keep track of the front-end value so a later set is not
+                # mistaken for a no-op.
+                attr = "{}:{}".format(data['channel'], data['name'])
+                self._digests[attr] = _digest(data.get('new_val', None))
+                self._values[attr] = data.get('new_val', None)
+                if attr in self._history and isinstance(self._values[attr], list):
+                    history = deque(self._values[attr], self._history[attr].maxlen)
+                    self._history[attr] = self._values[attr] = history
             if 'channel' in data and data['channel'] in self.watch_handlers:
                 chan_handlers = self.watch_handlers[data['channel']]
                 if 'name' in data and data['name'] in chan_handlers:
-                    handler = chan_handlers[data['name']]
+                    watcher = chan_handlers[data['name']]
                     old = data.get('old_val', None)
                     new = data.get('new_val', None)
-                    try:
-                        handler(old, new)
-                        self.ok()
-                    except Exception as e:
-                        self.error("Error executing watch handler for {} on "
-                                   "channel {}: {}".format(
-                                    data['name'], data['channel'], str(e)))
+                    if watcher.coalesces():
+                        self._coalesce(watcher, data['name'], data['channel'], old, new)
+                    else:
+                        self._dispatch(watcher, data['name'], data['channel'], old, new)
+
+    def _coalesce(self, watcher, key, chan, old, new):
+        """
+        Accumulates a change into the watcher's current burst, calling the
+        handler right away or scheduling it according to the watcher's
+        debounce and throttle periods.
+        """
+        now = time.time()
+        if watcher.burst is None and watcher.ready(now):
+            # Leading edge of a throttled burst.
+            watcher.last_call = now
+            self._dispatch(watcher, key, chan, old, new)
+            return
+
+        restart = watcher.add_to_burst(old, new, now)
+        if restart or watcher.timer is None:
+            if watcher.timer is not None:
+                self._loop.remove_timeout(watcher.timer)
+            watcher.timer = self._loop.call_later(
+                watcher.delay(now), self._release, watcher, key, chan)
+
+    def _release(self, watcher, key, chan):
+        """
+        Calls the handler with the changes accumulated in the watcher's burst.
+        """
+        watcher.timer = None
+        if watcher.burst is not None:
+            old, new = watcher.burst
+            watcher.burst = None
+            watcher.last_call = time.time()
+            self._dispatch(watcher, key, chan, old, new)
+
+    def _dispatch(self, watcher, key, chan, old, new):
+        """
+        Invokes a watch handler. Coroutine and threaded handlers run in the
+        background, one at a time per variable, with changes arriving in the
+        meantime queued until the running one completes.
+        """
+        name = "{}:{}".format(chan, key)
+        trace = Trace("Channel", name)
+        if not watcher.is_async():
+            try:
+                with trace.phase("handler"), profiled(self, name):
+                    watcher.handler(old, new)
+                trace.finish()
+                self.ok(**trace.status())
+            except Exception as e:
+                trace.finish()
+                self._watch_error(key, chan, e)
+            finally:
+                # the handler may have changed data that DataFrame widgets share
+                self._invalidate_caches()
+            return
+
+        if watcher.running:
+            watcher.enqueue(old, new)
+            return
+
+        watcher.running = True
+        start = time.time()
+        try:
+            if watcher.threaded:
+                handler = profiled_call(watcher.handler, self, name)
+                future = thread_pool().submit(handler, old, new)
+            else:
+                future = to_future(watcher.handler(old, new))
+        except Exception as e:
+            watcher.running = False
+            self._watch_error(key, chan, e)
+            return
+
+        self._loop.add_future(
+            future, lambda f: self._watch_done(watcher, key, chan, f, trace, start))
+
+    def _watch_done(self, watcher, key, chan, future, trace, start):
+        watcher.running = False
+        self._invalidate_caches()
+        trace.add_phase("handler", time.time() - start)
+        trace.finish()
+        error = future.exception()
+        if error is None:
+            self.ok(**trace.status())
+        else:
+            self._watch_error(key, chan, error)
+
+        if watcher.queue:
+            old, new = watcher.queue.popleft()
+            self._dispatch(watcher, key, chan, old, new)
+
+    def _watch_error(self, key, chan, e):
+        self.error("Error executing watch handler for {} on "
+                   "channel {}: {}".format(key, chan, str(e)))
+
+
+class Watcher(object):
+    """ A watch handler registered for a channel variable. """
+
+    def __init__(self, handler, threaded=False, drop_stale=True,
+                 debounce_ms=None, throttle_ms=None):
+        self.handler = handler
+        self.threaded = threaded
+        self.drop_stale = drop_stale
+        self.debounce = (debounce_ms or 0) / 1000.0
+        self.throttle = (throttle_ms or 0) / 1000.0
+
+        # (first old, last new) values of the changes being coalesced
+        self.burst = None
+        self.burst_start = 0
+
+        # the time the handler was last called and the timer that will call
+        # it for the current burst
+        self.last_call = 0
+        self.timer = None
+
+        # True while a coroutine or threaded invocation is in progress
+        self.running = False
+
+        # (old, new) changes waiting for the running invocation to complete
+        self.queue = deque()
+
+    def is_async(self):
+        return self.threaded or is_coroutine_function(self.handler)
+
+    def coalesces(self):
+        return bool(self.debounce or self.throttle)
+
+    def ready(self, now):
+        """
+        Returns True if a change can be delivered immediately, i.e. no
+        debounce and the throttle period since the last call has elapsed.
+        """
+        return not self.debounce and now - self.last_call >= self.throttle
+
+    def add_to_burst(self, old, new, now):
+        """
+        Adds a change to the current burst. Returns True if the timer for the
+        burst must be restarted.
+        """
+        if self.burst is None:
+            self.burst = (old, new)
+            self.burst_start = now
+        else:
+            self.burst = (self.burst[0], new)
+        return bool(self.debounce)
+
+    def delay(self, now):
+        """
+        Returns the number of seconds until the current burst is delivered.
+        """
+        if self.debounce and self.throttle:
+            return max(min(self.debounce, self.burst_start + self.throttle - now), 0)
+        elif self.debounce:
+            return self.debounce
+        else:
+            return max(self.last_call + self.throttle - now, 0)
+
+    def enqueue(self, old, new):
+        if self.drop_stale and self.queue:
+            # Keep the oldest value so the handler sees the whole transition.
+            old = self.queue.popleft()[0]
+        self.queue.append((old, new))
+
+
+def _digest(serialized):
+    """ Returns a compact digest of a serialized channel value. """
+    dumped = json.dumps(serialized, sort_keys=True, default=repr)
+    return hashlib.sha1(dumped.encode('utf-8')).digest()
 
 
 class Channel:
@@ -93,6 +541,11 @@ class Channel:
         self.chan = chan
 
     def set(self, key, value, **kwargs):
+        """
+        Sets the value of a variable on this channel. See `Channels.set` for
+        the supported keyword arguments, e.g. `max_rate` to throttle updates
+        sent from a loop.
+        """
         global the_channels, channel_data
         # If the Channels model hasn't been created yet, keep track of values
         # that have been specified, otherwise go ahead and set the value.
@@ -104,15 +557,53 @@ class Channel:
         else:
             the_channels.set(key, value, self.chan, **kwargs)
 
-    def watch(self, key, handler):
+    def append(self, key, value, maxlen=10000, **kwargs):
+        """
+        Appends a value to a variable on this channel holding a list. See
+        `Channels.append` for the supported keyword arguments.
+        """
+        global the_channels, channel_data
+        if the_channels is None:
+            params = channel_data[self.chan].get(key)
+            history = params['value'] if params else None
+            if not isinstance(history, deque) or history.maxlen != maxlen:
+                history = deque(history if isinstance(history, (deque, list, tuple)) else (), maxlen)
+                channel_data[self.chan][key] = {
+                    'value': history,
+                    'args': {}
+                }
+            history.append(value)
+        else:
+            the_channels.append(key, value, self.chan, maxlen, **kwargs)
+
+    def get(self, key, default=None):
+        """
+        Returns the latest value of a variable on this channel known by the
+        kernel, or `default` if it has no known value.
+        """
+        global the_channels, channel_data
+        if the_channels is None:
+            params = channel_data.get(self.chan, {}).get(key)
+            if params is None:
+                return default
+            value = params['value']
+            return list(value) if isinstance(value, deque) else value
+        else:
+            return the_channels.get(key, self.chan, default)
+
+    def watch(self, key, handler, **kwargs):
+        """
+        Registers a handler for changes to a variable on this channel. See
+        `Channels.watch` for the supported keyword arguments.
+        """
         global the_channels, channel_watchers
         # If the Channels models hasn't been created yet, keep track of watch
         # handlers that have been specified, otherwise go ahead and set the
         # watch handler.
         if the_channels is None:
-            channel_watchers[self.chan][key] = handler
+            channel_watchers[self.chan][key] = Watcher(handler, **kwargs)
         else:
-            the_channels.watch(key, handler, self.chan)
+            the_channels.watch(key, handler, self.chan, **kwargs)
 
 
 def channel(chan='default'):
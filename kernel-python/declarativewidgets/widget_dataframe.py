@@ -1,16 +1,22 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
 
-from traitlets import Unicode, Integer # Used to declare attributes of our widget
+from traitlets import Unicode, Integer, Bool, Float # Used to declare attributes of our widget
 from IPython.core.getipython import get_ipython
 
 from .util.serializer import Serializer
-from .util.query import apply_query
+from .util.query import apply_query, apply_offset, reverse_sort, fingerprint, detects_changes
 from .urth_widget import UrthWidget
 from .urth_exception import UrthException
+from .util.instrumentation import Trace, row_count, serialized_row_count
+from .util.profiling import profiled
+from .util.names import name_resolver
+from .util.sharing import shared_results
+from .util.idle import idle_scheduler
+from .util.adaptive import AdaptiveLimit
 import json
-
-from functools import reduce
+import time
+import weakref
 
 
 class DataFrame(UrthWidget):
@@ -19,7 +25,25 @@ class DataFrame(UrthWidget):
     """
     variable_name = Unicode('', sync=True)
     limit = Integer(100, sync=True)
+    offset = Integer(0, sync=True)
     query = Unicode('[]', sync=True)
+    timing = Bool(False, sync=True)
+
+    # Whether the value is pushed to the front-end when a cell execution
+    # changes the bound variable, instead of the front-end syncing after each.
+    auto = Bool(False, sync=True)
+
+    # Whether the previous and next windows of `limit` rows, and the current
+    # one in reverse sort order, are computed while the kernel is idle, so
+    # paging and sorting are served without waiting on the query.
+    prefetch = Bool(False, sync=True)
+
+    # Budgets for the rows sent, in milliseconds spent serializing and
+    # encoding them and in encoded bytes. If either is set, the number of
+    # rows sent is adapted to fit them instead of being `limit`, and is sent
+    # back as `effective_limit`.
+    latency_budget = Float(0, sync=True)
+    byte_budget = Integer(0, sync=True)
 
     def __init__(self, value=None, **kwargs):
         self.log.info("Created a new DataFrame widget.")
@@ -27,8 +51,20 @@ class DataFrame(UrthWidget):
         self.on_msg(self._handle_state_msg)
         self.shell = get_ipython()
         self.serializer = Serializer()
+
+        # fingerprint of the variable when its value was last sent
+        self._sent_fingerprint = None
+        self._adaptive = AdaptiveLimit()
         super(DataFrame, self).__init__(**kwargs)
 
+    def _auto_changed(self, old, new):
+        if new:
+            _watch_for_changes(self)
+        else:
+            _auto_refreshed.discard(self)
+        # let the front-end know it need not sync after each execution
+        self._send_update("auto_push", new)
+
     def _variable_name_changed(self, old, new):
         self.log.info("Binding to variable name {}...".format(new))
 
@@ -40,21 +76,118 @@ class DataFrame(UrthWidget):
 
     def _the_dataframe(self):
         try:
-            name = self.variable_name.split('.')
-            return reduce(lambda x, y: getattr(x, y), [self.shell.user_ns[name.pop(0)]] + name)
+            return name_resolver(self.shell).resolve(self.variable_name)
         except (KeyError, AttributeError):
             raise UrthException("Invalid DataFrame name {}".format(
                 self.variable_name))
 
     def _handle_state_msg(self, wid, content, buffers):
         if content.get("event", "") == "sync":
-            self._sync_state()
+            with self.hold_updates(), profiled(self, self.variable_name):
+                self._sync_state()
 
-    def _sync_state(self):
+    def _changed_since_sent(self):
+        """
+        Returns True if the bound variable may have been rebound or changed
+        since its value was last sent. Changes in place to data whose
+        fingerprint cannot detect them, e.g. dicts, are always assumed.
+        """
         try:
             val = self._the_dataframe()
-            serialized_result = self.serializer.serialize(apply_query(val, json.loads(self.query)), limit=self.limit, query=self.query)
-            self._send_update("value", serialized_result)
-            self.ok()
+        except UrthException:
+            return self._sent_fingerprint is not None
+        if not detects_changes(val):
+            return True
+        return fingerprint(val) != self._sent_fingerprint
+
+    def _push_if_changed(self):
+        """Sends the value if the bound variable changed since last sent."""
+        if self._changed_since_sent():
+            with self.hold_updates(), profiled(self, self.variable_name):
+                self._sync_state()
+
+    def _sync_state(self):
+        trace = Trace("DataFrame", self.variable_name, self.model_id, self.timing)
+        self._sent_fingerprint = None
+        try:
+            with trace.phase("resolve"):
+                val = self._the_dataframe()
+            self._sent_fingerprint = fingerprint(val)
+            trace.rows(rows_in=row_count(val))
+            query = json.loads(self.query)
+            limit = self._adaptive.widget_limit(self)
+            serialized_result = self._shared_value(
+                val, self._sent_fingerprint, query, self.offset, limit, trace)
+            if self.prefetch:
+                self._schedule_prefetch(val, self._sent_fingerprint, query, limit)
+            with trace.phase("send"):
+                self._send_update("value", serialized_result)
+                if self._adaptive.enabled(self):
+                    self._send_update("effective_limit", limit)
+            trace.rows(rows_out=serialized_row_count(serialized_result))
+            trace.payload(serialized_result)
+            trace.finish()
+            self.ok(**trace.status())
         except Exception as e:
-            self.error(e)
+            trace.finish()
+            self.error(e, **trace.status())
+
+    def _shared_value(self, val, fprint, query, offset, limit, trace):
+        """
+        Returns the serialized window of the queried value, computed once for
+        widgets bound to the same data with the same query, offset and limit.
+        """
+        def compute():
+            with trace.phase("query"):
+                result = apply_offset(apply_query(val, query), offset)
+            with trace.phase("serialize"):
+                start = time.time()
+                serialized = self.serializer.serialize(result, limit=limit, query=json.dumps(query))
+            if self._adaptive.enabled(self):
+                self._adaptive.measure(serialized_row_count(serialized),
+                                       time.time() - start, serialized)
+            return serialized
+
+        key = (fprint, json.dumps(query, sort_keys=True), limit, offset)
+        return shared_results(self.shell).get_or_compute(key, compute)
+
+    def _schedule_prefetch(self, val, fprint, query, limit):
+        """
+        Schedules computing the windows the front-end is likely to ask for
+        next while the kernel is idle.
+        """
+        requests = [(query, self.offset + limit)]
+        if self.offset > 0:
+            requests.append((query, max(self.offset - limit, 0)))
+        reversed_query = reverse_sort(query)
+        if reversed_query is not None:
+            requests.append((reversed_query, self.offset))
+
+        trace = Trace("DataFrame", self.variable_name)
+        scheduler = idle_scheduler()
+        for i, (q, offset) in enumerate(requests):
+            scheduler.schedule(
+                ("prefetch", self.model_id, i),
+                lambda q=q, offset=offset: self._shared_value(val, fprint, q, offset, limit, trace))
+
+
+# DataFrame widgets whose value is pushed when a cell execution changes it
+_auto_refreshed = weakref.WeakSet()
+_hooked_shells = weakref.WeakSet()
+
+
+def _watch_for_changes(widget):
+    _auto_refreshed.add(widget)
+    if widget.shell not in _hooked_shells:
+        widget.shell.events.register('post_run_cell', _push_changed)
+        _hooked_shells.add(widget.shell)
+
+
+def _push_changed(*args):
+    """Pushes the value of the auto refreshed widgets whose variable changed."""
+    for widget in list(_auto_refreshed):
+        if widget.comm is None:
+            # closed
+            _auto_refreshed.discard(widget)
+        else:
+            widget._push_if_changed()
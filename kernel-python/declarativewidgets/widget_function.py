@@ -1,15 +1,33 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
 
-from traitlets import Integer, Unicode # Used to declare attributes of our widget
+import inspect
+import threading
+import time
+
+from traitlets import Integer, Unicode, Bool, Float, Enum # Used to declare attributes of our widget
 from IPython.core.getipython import get_ipython
+from tornado.ioloop import IOLoop
 
 from .util.serializer import Serializer
-from .util.functions import apply_with_conversion, signature_spec
+from .util.functions import (converted_args, args_key, signature_spec,
+                             apply_converted, apply_batch)
+from .util.cache import LRUCache
+from .util.concurrency import (is_coroutine_function, to_future, thread_pool,
+                               process_worker, pickle_call, call_pickled,
+                               run_cancellable, terminate_process_worker)
 from .urth_widget import UrthWidget
 from .urth_exception import UrthException
+from .util.instrumentation import Trace, row_count, serialized_row_count
+from .util.profiling import profiled, wrap as profiled_call
+from .util.names import name_resolver
+from .util.adaptive import AdaptiveLimit
 
-from functools import reduce
+try:
+    _end_of_stream = (StopIteration, StopAsyncIteration)
+except NameError:
+    # Python 2
+    _end_of_stream = (StopIteration,)
 
 
 class Function(UrthWidget):
@@ -18,6 +36,32 @@ class Function(UrthWidget):
     """
     function_name = Unicode('', sync=True)
     limit = Integer(100, sync=True)
+    timing = Bool(False, sync=True)
+
+    # Number of results to memoize by arguments, disabled if 0, and the
+    # number of seconds they are kept for, forever if 0.
+    cache_size = Integer(0, sync=True)
+    cache_ttl = Float(0, sync=True)
+
+    # Where the function runs: in the kernel, blocking it until it returns, in
+    # the shared thread pool, or in a worker process of its own. Coroutine
+    # functions always run on the kernel's event loop.
+    execution = Enum(['inline', 'thread', 'process'], 'inline', sync=True)
+
+    # Number of milliseconds after which an invocation running in the
+    # background is cancelled, never if 0. Inline invocations block the
+    # kernel and cannot be timed out.
+    timeout = Float(0, sync=True)
+
+    # Budgets for the rows of DataFrame results, in milliseconds spent
+    # serializing and encoding them and in encoded bytes. If either is set,
+    # the number of rows sent is adapted to fit them instead of being
+    # `limit`, and is sent back as `effective_limit`.
+    latency_budget = Float(0, sync=True)
+    byte_budget = Integer(0, sync=True)
+
+    # Maximum number of streamed chunks sent ahead of the front-end's acks.
+    stream_window = 4
 
     def __init__(self, **kwargs):
         self.log.info("Created a new Function widget.")
@@ -25,27 +69,67 @@ class Function(UrthWidget):
         self.on_msg(self._handle_custom_event_msg)
         self.shell = get_ipython()
         self.serializer = Serializer()
+        self._loop = IOLoop.current()
+        self._results = None
+        self._cached_function = None
+        self._adaptive = AdaptiveLimit()
+
+        # future of the background invocation in progress
+        self._pending = None
+
+        # generator invocation in progress
+        self._stream = None
+
+        # cancels the invocation in progress: a timeout, the event checked by
+        # a function in the thread pool, and whether it runs in the worker
+        # process
+        self._timer = None
+        self._cancel_event = None
+        self._in_process = False
+
+        # executor of the worker process, created on first use
+        self._worker = None
         super(Function, self).__init__(**kwargs)
 
+    def _cache_size_changed(self, old, new):
+        self.clear_cache()
+
+    def _cache_ttl_changed(self, old, new):
+        self.clear_cache()
+
     def _function_name_changed(self, old, new):
-        try:
-            self.log.info("Binding to function name {}...".format(new))
-            self._sync_state()
-            self.ok()
-        except Exception as e:
-            self.error(e)
+        self.clear_cache()
+        with self.hold_updates():
+            try:
+                self.log.info("Binding to function name {}...".format(new))
+                self._sync_state()
+                self.ok()
+            except Exception as e:
+                self.error(e)
 
     def _handle_custom_event_msg(self, wid, content, buffers):
+        with self.hold_updates():
+            self._handle_event(content)
+
+    def _handle_event(self, content):
         event = content.get('event', '')
         if event == 'invoke':
             self._invoke(content.get('args', {}))
+        elif event == 'invoke_batch':
+            self._invoke_batch(content.get('args_list', []))
         elif event == 'sync':
             self._sync_state()
+        elif event == 'invalidate':
+            self.clear_cache()
+        elif event == 'ack':
+            self._ack(content.get('seq', 0))
+        elif event == 'cancel':
+            self._cancel("cancelled", "Invocation of function {} was "
+                         "cancelled".format(self.function_name))
 
     def _the_function(self):
         try:
-            name = self.function_name.split('.')
-            return reduce(lambda x, y: getattr(x, y), [self.shell.user_ns[name.pop(0)]] + name)
+            return name_resolver(self.shell).resolve(self.function_name)
         except (KeyError, AttributeError):
             raise UrthException("Invalid function name {}".format(
                 self.function_name))
@@ -53,14 +137,330 @@ class Function(UrthWidget):
     def _invoke(self, args):
         self.log.info("Invoking function {} with args {}...".format(
             self.function_name, args))
+        trace = Trace("Function", self.function_name, self.model_id, self.timing)
+        try:
+            with trace.phase("resolve"):
+                func = self._the_function()
+            self._cancel_pending()
+            if _is_generator_function(func):
+                self._invoke_stream(func, args, trace)
+                return
+            if is_coroutine_function(func) or self.execution != 'inline':
+                self._invoke_async(func, args, trace)
+                return
+            with trace.phase("invoke"), profiled(self, self.function_name):
+                result = self._apply(func, args)
+            self._send_result(result, trace)
+        except Exception as e:
+            self._invoke_error(e, trace)
+
+    def _invoke_stream(self, func, args, trace):
+        """
+        Streams the values yielded by a generator or async generator function.
+        The `result` is reset to an empty list, then each value is sent as a
+        `chunk` message with a sequence number for the front-end to append and
+        ack. At most `stream_window` chunks are sent ahead of the acks, and the
+        generator is not advanced meanwhile. Values are pulled on the kernel's
+        event loop, so other messages are handled between them.
+        """
+        with trace.phase("invoke"):
+            generator = apply_converted(func, converted_args(func, args))
+        self._send_update("result", [])
+        self._stream = Stream(generator, trace)
+        self._start_timer()
+        self._pull(self._stream)
+
+    def _pull(self, stream):
+        if stream is not self._stream or stream.pulling or \
+                stream.seq - stream.acked >= self.stream_window:
+            return
+
+        stream.pulling = True
+        start = time.time()
+        if stream.is_async:
+            future = to_future(stream.generator.__anext__())
+            self._loop.add_future(future, lambda f: self._pulled(stream, f, start))
+        else:
+            self._loop.add_callback(self._pulled, stream, None, start)
+
+    def _pulled(self, stream, future, start):
+        stream.pulling = False
+        if stream is not self._stream:
+            # cancelled by a newer invocation
+            return
+
+        trace = stream.trace
+        try:
+            chunk = next(stream.generator) if future is None else future.result()
+            trace.add_phase("invoke", time.time() - start)
+        except _end_of_stream:
+            self._stream = None
+            self._clear_timer()
+            self._invalidate_caches()
+            trace.rows(rows_out=stream.seq)
+            trace.finish()
+            self.ok(chunks=stream.seq, **trace.status())
+            return
+        except Exception as e:
+            self._stream = None
+            self._clear_timer()
+            self._invoke_error(e, trace)
+            return
+
         try:
-            result = apply_with_conversion(self._the_function(), args)
+            with trace.phase("serialize"):
+                serialized_chunk = self.serializer.serialize(
+                    chunk, limit=self._adaptive.widget_limit(self))
+            with trace.phase("send"):
+                self.send({"event": "chunk", "seq": stream.seq, "result": serialized_chunk})
+        except Exception as e:
+            self._cancel_pending()
+            self._invoke_error(e, trace)
+            return
+
+        stream.seq += 1
+        self._pull(stream)
+
+    def _ack(self, seq):
+        """Resumes a stream once the front-end has received chunk `seq`."""
+        stream = self._stream
+        if stream is not None:
+            stream.acked = max(stream.acked, seq + 1)
+            self._pull(stream)
+
+    def _invoke_batch(self, args_list):
+        """
+        Invokes the function once for each set of arguments, sending all the
+        results in a single `batch_result` update. Batched functions are called
+        once for the whole batch. Results are not memoized.
+        """
+        self.log.info("Invoking function {} with a batch of {} calls...".format(
+            self.function_name, len(args_list)))
+        trace = Trace("Function", self.function_name, self.model_id, self.timing)
+        try:
+            with trace.phase("resolve"):
+                func = self._the_function()
+            if is_coroutine_function(func):
+                raise UrthException("Batch invocation of coroutine function {} "
+                                    "is not supported".format(self.function_name))
+            self._cancel_pending()
+            converted_list = [converted_args(func, args) for args in args_list]
+            if self.execution == 'inline':
+                with trace.phase("invoke"), profiled(self, self.function_name):
+                    results = apply_batch(func, converted_list)
+                self._send_batch_result(results, trace)
+                return
+
+            start = time.time()
+            future = self._pending = self._submit(apply_batch, func, converted_list)
+            self._start_timer()
+            self._loop.add_future(future, lambda f: self._invoke_done(
+                f, None, None, trace, start, self._send_batch_result))
+        except Exception as e:
+            self._invoke_error(e, trace)
+
+    def _invoke_async(self, func, args, trace):
+        """
+        Runs a coroutine function on the kernel's event loop, or a function in
+        the thread pool or the worker process, sending the result when it
+        completes. A newer invocation cancels the one in progress, if it has
+        not started running in the thread pool yet, and discards its result.
+        """
+        converted = converted_args(func, args)
+        cache = self._cache(func)
+        key = args_key(converted)
+        if cache is not None:
+            try:
+                result = cache[key]
+            except KeyError:
+                pass
+            else:
+                self._send_result(result, trace)
+                return
+
+        start = time.time()
+        future = self._pending = self._start(func, converted)
+        self._start_timer()
+        self._loop.add_future(
+            future, lambda f: self._invoke_done(f, cache, key, trace, start))
+
+    def _start(self, func, converted):
+        if is_coroutine_function(func):
+            return to_future(func(**converted))
+        return self._submit(apply_converted, func, converted)
+
+    def _submit(self, fn, *args):
+        """
+        Runs a call in the thread pool or the worker process, per `execution`.
+        Calls in the thread pool are profiled on request, calls in the worker
+        process are not.
+        """
+        if self.execution == 'thread':
+            self._cancel_event = threading.Event()
+            fn = profiled_call(fn, self, self.function_name)
+            return thread_pool().submit(run_cancellable, self._cancel_event, fn, *args)
+
+        try:
+            payload = pickle_call(fn, *args)
+        except Exception as e:
+            raise UrthException(
+                "Function {} and its arguments must be picklable to run in a "
+                "process: {}".format(self.function_name, str(e)))
+        if self._worker is None:
+            self._worker = process_worker()
+        self._in_process = True
+        return self._worker.submit(call_pickled, payload)
+
+    def _invoke_done(self, future, cache, key, trace, start, send=None):
+        if future is not self._pending:
+            # superseded by a newer invocation
+            return
+
+        self._pending = None
+        self._cancel_event = None
+        self._in_process = False
+        self._clear_timer()
+        trace.add_phase("invoke", time.time() - start)
+        with self.hold_updates():
+            try:
+                result = future.result()
+                if cache is not None:
+                    cache[key] = result
+                (send or self._send_result)(result, trace)
+            except Exception as e:
+                self._invoke_error(e, trace)
+
+    def _cancel_pending(self):
+        """
+        Cancels the invocation in progress and discards its result. Coroutines
+        are cancelled and generators closed. Functions in the thread pool can
+        check `cancelled()` to return early. Functions already running in the
+        worker process are stopped by terminating it, which affects no other
+        widget.
+        """
+        self._clear_timer()
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+        if self._pending is not None:
+            if not self._pending.cancel() and self._in_process:
+                self._terminate_worker()
+            self._pending = None
+        self._in_process = False
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _terminate_worker(self):
+        if self._worker is not None:
+            terminate_process_worker(self._worker)
+            self._worker = None
+
+    def close(self):
+        self._cancel_pending()
+        if self._worker is not None:
+            self._worker.shutdown(wait=False)
+            self._worker = None
+        super(Function, self).close()
+
+    def _cancel(self, status, msg):
+        """Cancels the invocation in progress, if any, and sends the status."""
+        if self._pending is None and self._stream is None:
+            return
+        self._cancel_pending()
+        self.send_status(status, msg)
+
+    def _start_timer(self):
+        if self.timeout:
+            self._timer = self._loop.call_later(
+                self.timeout / 1000.0, self._timed_out)
+
+    def _clear_timer(self):
+        if self._timer is not None:
+            self._loop.remove_timeout(self._timer)
+            self._timer = None
+
+    def _timed_out(self):
+        self._timer = None
+        self._cancel("timeout", "Function {} timed out after {} ms".format(
+            self.function_name, self.timeout))
+
+    def _send_result(self, result, trace):
+        # the function may have changed data that DataFrame widgets share
+        self._invalidate_caches()
+        trace.rows(rows_in=row_count(result))
+        limit = self._adaptive.widget_limit(self)
+        with trace.phase("serialize"):
+            start = time.time()
             serialized_result = self.serializer.serialize(
-                result, limit=self.limit)
+                result, limit=limit)
+        if self._adaptive.enabled(self):
+            self._adaptive.measure(serialized_row_count(serialized_result),
+                                   time.time() - start, serialized_result)
+        with trace.phase("send"):
             self._send_update("result", serialized_result)
-            self.ok()
-        except Exception as e:
-            self.error("Error while invoking function: {}".format(str(e)))
+            if self._adaptive.enabled(self):
+                self._send_update("effective_limit", limit)
+        trace.rows(rows_out=serialized_row_count(serialized_result))
+        trace.payload(serialized_result)
+        trace.finish()
+        self.ok(**trace.status())
+
+    def _send_batch_result(self, results, trace):
+        self._invalidate_caches()
+        trace.rows(rows_in=len(results))
+        limit = self._adaptive.widget_limit(self)
+        with trace.phase("serialize"):
+            serialized_results = [self.serializer.serialize(result, limit=limit)
+                                  for result in results]
+        with trace.phase("send"):
+            self._send_update("batch_result", serialized_results)
+        trace.payload(serialized_results)
+        trace.finish()
+        self.ok(**trace.status())
+
+    def _invoke_error(self, e, trace):
+        self._invalidate_caches()
+        trace.finish()
+        self.error("Error while invoking function: {}".format(str(e)),
+                   **trace.status())
+
+    def _apply(self, func, args):
+        """
+        Calls the function with the converted arguments, returning a memoized
+        result for the same arguments if caching is enabled.
+        """
+        converted = converted_args(func, args)
+        cache = self._cache(func)
+        if cache is None:
+            return apply_converted(func, converted)
+
+        key = args_key(converted)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        result = cache[key] = apply_converted(func, converted)
+        return result
+
+    def _cache(self, func):
+        """
+        Returns the memoized results of the function, or None if caching is
+        disabled.
+        """
+        if not self.cache_size:
+            return None
+
+        if func is not self._cached_function or self._results is None:
+            # the name was rebound to another function since results were cached
+            self._results = LRUCache(self.cache_size, self.cache_ttl or None)
+            self._cached_function = func
+        return self._results
+
+    def clear_cache(self):
+        """Discards the memoized results of the function."""
+        self._results = None
+        self._cached_function = None
 
     def _sync_state(self):
         try:
@@ -68,3 +468,31 @@ class Function(UrthWidget):
             self._send_update("signature", signature)
         except Exception as e:
             self.error("Error while getting function signature: {}".format(str(e)))
+
+
+class Stream(object):
+    """ A generator invocation whose values are being sent to the front-end. """
+
+    def __init__(self, generator, trace):
+        self.generator = generator
+        self.trace = trace
+        self.is_async = not inspect.isgenerator(generator)
+
+        # number of chunks sent and acked by the front-end
+        self.seq = 0
+        self.acked = 0
+
+        # True while waiting for the next value
+        self.pulling = False
+
+    def close(self):
+        if not self.is_async:
+            self.generator.close()
+        elif not self.pulling:
+            to_future(self.generator.aclose())
+
+
+def _is_generator_function(func):
+    isasyncgenfunction = getattr(inspect, 'isasyncgenfunction', None)
+    return inspect.isgeneratorfunction(func) or \
+        (isasyncgenfunction is not None and isasyncgenfunction(func))
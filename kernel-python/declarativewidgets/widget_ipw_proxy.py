@@ -6,6 +6,8 @@ from IPython.core.getipython import get_ipython
 
 from .urth_widget import UrthWidget
 from .urth_exception import UrthException
+from .util.instrumentation import Trace
+from .util.names import name_resolver
 
 class IpywProxy(UrthWidget):
     """
@@ -22,12 +24,13 @@ class IpywProxy(UrthWidget):
         super(IpywProxy, self).__init__(**kwargs)
 
     def _widget_name_changed(self, old, new):
-        try:
-            self.log.info("Binding to widget name {}...".format(new))
-            self._sync_state()
-            self.ok()
-        except Exception as e:
-            self.error(e)
+        with self.hold_updates():
+            try:
+                self.log.info("Binding to widget name {}...".format(new))
+                self._sync_state()
+                self.ok()
+            except Exception as e:
+                self.error(e)
 
     def _handle_custom_event_msg(self, wid, content, buffers):
         event = content.get('event', '')
@@ -35,17 +38,21 @@ class IpywProxy(UrthWidget):
             self._sync_state()
 
     def _the_widget(self):
-        if self.widget_name in self.shell.user_ns:
-            return self.shell.user_ns[self.widget_name]
-        else:
+        try:
+            return name_resolver(self.shell).resolve(self.widget_name)
+        except (KeyError, AttributeError):
             raise UrthException("Could not find a widget with name {}".format(
                 self.widget_name))
 
     def _sync_state(self):
+        trace = Trace("IpywProxy", self.widget_name, self.model_id)
         try:
-            the_widget = self._the_widget()
+            with trace.phase("resolve"):
+                the_widget = self._the_widget()
             # display the widget
-            self._send_update("id", the_widget.model_id)
+            with trace.phase("send"):
+                self._send_update("id", the_widget.model_id)
+            trace.finish()
 
         except Exception as e:
             self.error("Error while getting the ipywidget model id: {}".format(str(e)))
@@ -0,0 +1,204 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from collections import deque
+from contextlib import contextmanager
+
+from IPython.utils.importstring import import_item
+from tornado.ioloop import IOLoop
+
+from .urth_widget import UrthWidget
+from .urth_exception import UrthException
+
+
+class Multiplexer(UrthWidget):
+    """
+    A widget hosting the kernel side of many urth widgets over its single
+    comm, so elements do not each open a comm of their own.
+
+    The front-end sends `frames` messages holding a list of frames, each
+    routed to a widget by its `id`:
+
+    - `{"id": id, "open": class_name}` creates a widget of the given class.
+    - `{"id": id, "data": data}` handles `data` as if received on the comm
+      of the widget, e.g. a custom message or a state sync.
+    - `{"id": id, "close": true}` closes the widget.
+
+    Messages the widgets send are framed the same way, `data` being the
+    message the widget would have sent on its comm. The frames sent while
+    handling a `frames` message are batched in a single message.
+
+    Frames may carry `"visible": false` as a hint that their element is not
+    on screen, e.g. when a large notebook is loaded. These are handled after
+    the others, one at a time on the event loop, so requests from visible
+    elements, including ones received in the meantime, are served first.
+    """
+
+    def __init__(self, **kwargs):
+        self.log.info("Created a new Multiplexer widget.")
+
+        self.on_msg(self._handle_frames_msg)
+        self._widgets = {}
+        self._loop = IOLoop.current()
+        self._deferred = deque()
+        self._deferred_scheduled = False
+        # frames and buffers held back to be sent together, see hold_frames()
+        self._held_frames = None
+        self._held_buffers = None
+
+        super(Multiplexer, self).__init__(**kwargs)
+
+    def _handle_frames_msg(self, wid, content, buffers):
+        if content.get('event', '') == 'frames':
+            with self.hold_frames():
+                for frame in content.get('frames', []):
+                    if frame.get('visible', True):
+                        self._route_after_deferred(frame, buffers or [])
+                    else:
+                        self._defer(frame, buffers or [])
+
+    def _defer(self, frame, buffers):
+        self._deferred.append((frame, buffers))
+        if not self._deferred_scheduled:
+            self._deferred_scheduled = True
+            self._loop.add_callback(self._route_deferred)
+
+    def _route_deferred(self):
+        """Routes the next deferred frame, yielding to other messages after."""
+        self._deferred_scheduled = False
+        if not self._deferred:
+            return
+        frame, buffers = self._deferred.popleft()
+        with self.hold_frames():
+            self._route(frame, buffers)
+        if self._deferred and not self._deferred_scheduled:
+            self._deferred_scheduled = True
+            self._loop.add_callback(self._route_deferred)
+
+    def _route_after_deferred(self, frame, buffers):
+        """
+        Routes a frame, first routing the deferred frames of the same widget
+        so its frames are handled in order.
+        """
+        rid = frame.get('id')
+        if any(deferred.get('id') == rid for deferred, _ in self._deferred):
+            remaining = deque()
+            for deferred, deferred_buffers in self._deferred:
+                if deferred.get('id') == rid:
+                    self._route(deferred, deferred_buffers)
+                else:
+                    remaining.append((deferred, deferred_buffers))
+            self._deferred = remaining
+        self._route(frame, buffers)
+
+    def _route(self, frame, buffers):
+        rid = frame.get('id')
+        if 'open' in frame:
+            self._open(rid, frame['open'])
+        elif 'data' in frame:
+            comm = self._widgets.get(rid)
+            if comm is None:
+                self.log.warning("Dropping frame for unknown widget {}".format(rid))
+                return
+            comm.handle_msg(frame['data'], [buffers[i] for i in frame.get('buffers', [])])
+        elif frame.get('close', False):
+            comm = self._widgets.get(rid)
+            if comm is not None:
+                comm.handle_close()
+
+    def _open(self, rid, class_name):
+        comm = MuxComm(self, rid)
+        self._widgets[rid] = comm
+        try:
+            widget_class = import_item(str(class_name))
+            if not (isinstance(widget_class, type) and
+                    issubclass(widget_class, UrthWidget)):
+                raise UrthException("{} is not an urth widget".format(class_name))
+            widget_class(comm=comm)
+        except Exception as e:
+            self.log.error("Could not create widget {}: {}".format(class_name, str(e)))
+            comm.close()
+
+    @contextmanager
+    def hold_frames(self):
+        """
+        Holds back the frames sent by the widgets within the context, and
+        sends them together in a single message when it exits. Nested
+        contexts send their frames with the outermost one.
+        """
+        if self._held_frames is not None:
+            yield
+            return
+
+        self._held_frames, self._held_buffers = [], []
+        try:
+            yield
+        finally:
+            frames, buffers = self._held_frames, self._held_buffers
+            self._held_frames = self._held_buffers = None
+            if frames:
+                self.send({"event": "frames", "frames": frames}, buffers or None)
+
+    def _send_frame(self, frame, buffers=None):
+        with self.hold_frames():
+            if buffers:
+                start = len(self._held_buffers)
+                self._held_buffers.extend(buffers)
+                frame["buffers"] = list(range(start, start + len(buffers)))
+            self._held_frames.append(frame)
+
+    def close(self):
+        for comm in list(self._widgets.values()):
+            comm.handle_close()
+        super(Multiplexer, self).close()
+
+
+class MuxComm(object):
+    """
+    Stands for the comm of a widget hosted by a `Multiplexer`, sending and
+    receiving its messages as frames of the multiplexer's comm.
+    """
+
+    def __init__(self, mux, rid):
+        self.mux = mux
+        self.rid = rid
+        self.comm_id = "{}/{}".format(mux.model_id, rid)
+        self._msg_callback = None
+        self._closed = False
+
+    @property
+    def kernel(self):
+        comm = self.mux.comm
+        return getattr(comm, 'kernel', None) if comm is not None else None
+
+    def on_msg(self, callback):
+        self._msg_callback = callback
+
+    def send(self, data=None, metadata=None, buffers=None):
+        if not self._closed:
+            self.mux._send_frame({"id": self.rid, "data": data}, buffers)
+
+    def close(self, data=None, metadata=None):
+        if not self._closed:
+            self._closed = True
+            self.mux._widgets.pop(self.rid, None)
+            self.mux._send_frame({"id": self.rid, "close": True})
+
+    def handle_msg(self, data, buffers):
+        if self._msg_callback is not None:
+            self._msg_callback({
+                "content": {"comm_id": self.comm_id, "data": data},
+                "buffers": buffers
+            })
+
+    def handle_close(self):
+        """Closes the widget after the front-end closed its end."""
+        self._closed = True
+        self.mux._widgets.pop(self.rid, None)
+        widget = self._widget()
+        if widget is not None:
+            widget.close()
+
+    def _widget(self):
+        callback = self._msg_callback
+        return getattr(callback, '__self__', None)